@@ -1,14 +1,18 @@
 import os
-import json
 import uuid
 import sqlite3
 from datetime import datetime
 from io import BytesIO
 import base64
+import orjson
 import subprocess
+import tempfile
+import shutil
 import threading
 import time
-from flask import Flask, render_template, request, jsonify, send_file, session
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from flask import Flask, Response, render_template, request, jsonify, send_file, send_from_directory, session
+from flask.json.provider import JSONProvider
 from werkzeug.utils import secure_filename
 from PIL import Image
 import requests
@@ -20,7 +24,17 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+class ORJSONProvider(JSONProvider):
+    """Flask JSON provider backed by orjson for faster (de)serialization."""
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 app.secret_key = os.getenv('FLASK_SECRET_KEY', 'your-secret-key-here')
 app.config['UPLOAD_FOLDER'] = 'static/uploads'
 app.config['GENERATED_FOLDER'] = 'static/generated'
@@ -32,12 +46,28 @@ for folder in [app.config['UPLOAD_FOLDER'], app.config['GENERATED_FOLDER'], app.
     os.makedirs(folder, exist_ok=True)
 
 class DatabaseManager:
+    PROJECTS_CACHE_TTL = 1.0  # seconds
+    
     def __init__(self, db_path='storyweaver.db'):
         self.db_path = db_path
+        self._local = threading.local()
+        # (timestamp, rows) for get_projects; see PROJECTS_CACHE_TTL
+        self._projects_cache = None
         self.init_database()
     
+    def _conn(self):
+        # One connection per thread, opened lazily and reused across requests
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA temp_store=MEMORY')
+            self._local.conn = conn
+        return conn
+    
     def init_database(self):
-        conn = sqlite3.connect(self.db_path)
+        conn = self._conn()
         cursor = conn.cursor()
         
         cursor.execute('''
@@ -73,8 +103,19 @@ class DatabaseManager:
             )
         ''')
         
+        # Let content lookups and the project list walk an index in order
+        # instead of scanning and sorting
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_content_project_order
+            ON content (project_id, order_index)
+        ''')
+        
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_projects_updated
+            ON projects (updated_at DESC)
+        ''')
+        
         conn.commit()
-        conn.close()
         
         # Insert default templates
         self.insert_default_templates()
@@ -153,160 +194,208 @@ class DatabaseManager:
             }
         ]
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for template in templates:
-            cursor.execute('''
-                INSERT OR REPLACE INTO templates (id, name, type, latex_template)
-                VALUES (?, ?, ?, ?)
-            ''', (template['id'], template['name'], template['type'], template['template']))
+        with self._conn() as conn:
+            for template in templates:
+                conn.execute('''
+                    INSERT OR REPLACE INTO templates (id, name, type, latex_template)
+                    VALUES (?, ?, ?, ?)
+                ''', (template['id'], template['name'], template['type'], template['template']))
         
-        conn.commit()
-        conn.close()
+        self._refresh_template_cache()
+    
+    def _refresh_template_cache(self):
+        # Templates only change when they are (re)seeded, so PDF builds read
+        # them from memory; call this after any template write
+        cursor = self._conn().cursor()
+        cursor.execute('SELECT type, latex_template FROM templates')
+        self.template_cache = dict(cursor.fetchall())
     
     def create_project(self, name, project_type, settings=None):
         project_id = str(uuid.uuid4())
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO projects (id, name, type, settings)
-            VALUES (?, ?, ?, ?)
-        ''', (project_id, name, project_type, json.dumps(settings or {})))
-        
-        conn.commit()
-        conn.close()
+        with self._conn() as conn:
+            conn.execute('''
+                INSERT INTO projects (id, name, type, settings)
+                VALUES (?, ?, ?, ?)
+            ''', (project_id, name, project_type, orjson.dumps(settings or {}).decode('utf-8')))
         
+        self._projects_cache = None
         return project_id
     
     def get_projects(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # The project list is polled by the UI but rarely changes, so serve
+        # it from memory for a short window
+        cached = self._projects_cache
+        if cached and time.monotonic() - cached[0] < self.PROJECTS_CACHE_TTL:
+            return cached[1]
+        
+        cursor = self._conn().cursor()
         
         cursor.execute('SELECT * FROM projects ORDER BY updated_at DESC')
         projects = cursor.fetchall()
         
-        conn.close()
+        self._projects_cache = (time.monotonic(), projects)
         return projects
     
     def add_content(self, project_id, content_type, text=None, image_path=None, audio_path=None, order_index=0):
         content_id = str(uuid.uuid4())
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         
-        cursor.execute('''
-            INSERT INTO content (id, project_id, type, content_text, image_path, audio_path, order_index)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        ''', (content_id, project_id, content_type, text, image_path, audio_path, order_index))
-        
-        conn.commit()
-        conn.close()
+        with self._conn() as conn:
+            conn.execute('''
+                INSERT INTO content (id, project_id, type, content_text, image_path, audio_path, order_index)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (content_id, project_id, content_type, text, image_path, audio_path, order_index))
         
+        self._projects_cache = None
         return content_id
     
+    def add_content_bulk(self, rows):
+        # rows: (id, project_id, type, content_text, image_path, audio_path, order_index)
+        with self._conn() as conn:
+            conn.executemany('''
+                INSERT INTO content (id, project_id, type, content_text, image_path, audio_path, order_index)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', rows)
+        
+        self._projects_cache = None
+    
     def get_project_content(self, project_id):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor = self._conn().cursor()
         
         cursor.execute('''
             SELECT * FROM content WHERE project_id = ? ORDER BY order_index
         ''', (project_id,))
-        content = cursor.fetchall()
-        
-        conn.close()
-        return content
+        return cursor.fetchall()
 
 from models.ai_service import AIService
 
+# Single-pass LaTeX escaping for user/AI supplied text
+_LATEX_TABLE = str.maketrans({
+    '&': r'\&',
+    '%': r'\%',
+    '$': r'\$',
+    '#': r'\#',
+    '_': r'\_',
+    '{': r'\{',
+    '}': r'\}',
+    '~': r'\textasciitilde{}',
+    '^': r'\textasciicircum{}',
+    '\\': r'\textbackslash{}',
+})
+
+# Pre-assembled LaTeX blocks for each content row
+_TEXT_SECTION_TEMPLATE = "\\section*{{{title}...}}\n\n{text}"
+_FIGURE_TEMPLATE = (
+    "\\begin{{figure}}[h!]\n"
+    "\\centering\n"
+    "\\includegraphics[width=0.8\\textwidth]{{{img}}}\n"
+    "\\end{{figure}}"
+)
+
 class PDFGenerator:
     def __init__(self, db_manager):
         self.db_manager = db_manager
+        # Prefer tectonic when available: it skips pdflatex's cold format load
+        # and reruns itself as needed; LATEX_ENGINE forces a specific engine
+        self.latex_engine = os.getenv('LATEX_ENGINE') or ('tectonic' if shutil.which('tectonic') else 'pdflatex')
     
     def generate_latex_code(self, project_id, template_type="storybook"):
-        conn = sqlite3.connect(self.db_manager.db_path)
-        cursor = conn.cursor()
-        
-        # Get project info
-        cursor.execute('SELECT * FROM projects WHERE id = ?', (project_id,))
-        project = cursor.fetchone()
-        
         # Get template
-        cursor.execute('SELECT latex_template FROM templates WHERE type = ?', (template_type,))
-        template = cursor.fetchone()
-        
-        # Get content
-        cursor.execute('SELECT * FROM content WHERE project_id = ? ORDER BY order_index', (project_id,))
-        content_items = cursor.fetchall()
-        
-        conn.close()
+        latex_template = self.db_manager.template_cache.get(template_type)
         
-        if not template:
+        if not latex_template:
             return None, "Template not found"
         
-        latex_template = template[0]
-        
-        # Build content sections
-        content_sections = []
-        for item in content_items:
-            if item[3]:  # content_text exists
-                # Sanitize text for LaTeX
-                sanitized_text = item[3].replace('&', '\\&').replace('%', '\\%').replace('$', '\\$')
-                sanitized_title = sanitized_text[:50].replace('{', '').replace('}', '')
-                content_sections.append(f"\\section*{{{sanitized_title}...}}")
-                content_sections.append(sanitized_text)
-                
-            if item[4]:  # image_path exists
-                abs_image_path = os.path.abspath(item[4])
-                content_sections.append(f"\\begin{{figure}}[h!]")
-                content_sections.append(f"\\centering")
-                content_sections.append(f"\\includegraphics[width=0.8\\textwidth]{{{abs_image_path}}}")
-                content_sections.append(f"\\end{{figure}}")
+        # Project name and its content in one round trip; a project without
+        # content still yields a single row with NULL content columns
+        cursor = self.db_manager._conn().cursor()
+        cursor.execute('''
+            SELECT p.name, c.content_text, c.image_path
+            FROM projects p
+            LEFT JOIN content c ON c.project_id = p.id
+            WHERE p.id = ?
+            ORDER BY c.order_index
+        ''', (project_id,))
+        rows = cursor.fetchall()
+        
+        project_name = rows[0][0] if rows else None
+        # Resolve relative image paths against one cwd lookup per build
+        cwd = os.getcwd()
+        
+        def content_blocks():
+            for _, content_text, image_path in rows:
+                if content_text:
+                    yield _TEXT_SECTION_TEMPLATE.format(
+                        # Cut the raw text so the slice can't split an escape sequence
+                        title=content_text[:50].translate(_LATEX_TABLE),
+                        text=content_text.translate(_LATEX_TABLE)
+                    )
+                if image_path:
+                    img = image_path if os.path.isabs(image_path) else os.path.join(cwd, image_path)
+                    yield _FIGURE_TEMPLATE.format(img=img)
         
         # Fill template
         latex_code = latex_template.format(
-            title=project[1] if project else "Generated Story",
+            title=project_name or "Generated Story",
             author="StoryWeaver AI",
             date=datetime.now().strftime("%Y-%m-%d"),
-            content="\n\n".join(content_sections)
+            content="\n\n".join(content_blocks())
         )
         
         return latex_code, None
     
     def compile_pdf(self, latex_code, output_filename):
+        # Each job compiles in its own scratch directory so concurrent builds
+        # never share .aux/.log files
+        build_dir = tempfile.mkdtemp(prefix='storyweaver_pdf_')
         try:
-            # Create temporary tex file
-            tex_file = f"{output_filename}.tex"
-            pdf_file = f"{output_filename}.pdf"
+            tex_file = os.path.join(build_dir, 'document.tex')
+            pdf_file = os.path.join(build_dir, 'document.pdf')
             
             with open(tex_file, 'w', encoding='utf-8') as f:
                 f.write(latex_code)
             
-            # Compile with pdflatex
-            result = subprocess.run([
-                'pdflatex', 
-                '-output-directory', 
-                os.path.dirname(output_filename),
-                tex_file
-            ], capture_output=True, text=True)
+            if self.latex_engine == 'tectonic':
+                command = ['tectonic', '--outdir', build_dir, tex_file]
+            else:
+                command = [
+                    self.latex_engine,
+                    '-interaction=nonstopmode',
+                    '-output-directory',
+                    build_dir,
+                    tex_file
+                ]
+            
+            result = subprocess.run(command, capture_output=True, text=True, timeout=120)
             
             if result.returncode == 0 and os.path.exists(pdf_file):
-                # Clean up auxiliary files
-                for ext in ['.aux', '.log', '.tex']:
-                    aux_file = f"{output_filename}{ext}"
-                    if os.path.exists(aux_file):
-                        os.remove(aux_file)
-                
-                return pdf_file, None
+                output_pdf = f"{output_filename}.pdf"
+                shutil.move(pdf_file, output_pdf)
+                return output_pdf, None
             else:
-                return None, result.stderr
+                return None, result.stderr or result.stdout
         
         except Exception as e:
             return None, str(e)
+        finally:
+            shutil.rmtree(build_dir, ignore_errors=True)
+
+# LaTeX engines are heavy (~100 MB RSS per run), so builds are funnelled through a
+# bounded pool instead of running directly on request threads
+PDF_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 2)
+# Job state lives in one JSON file per job_id rather than in process memory,
+# so a status poll can land on any gunicorn worker. Finished jobs stay
+# pollable for PDF_JOB_TTL seconds and are then dropped with their result
+PDF_JOBS_FOLDER = os.path.join(app.config['EXPORTS_FOLDER'], 'jobs')
+os.makedirs(PDF_JOBS_FOLDER, exist_ok=True)
+PDF_JOB_TTL = 600  # seconds
 
 # Initialize services
 db_manager = DatabaseManager()
-ai_service = AIService()
+# A single AIService (and its HTTP connection pool) per process
+if 'ai_service' not in app.extensions:
+    app.extensions['ai_service'] = AIService()
+ai_service = app.extensions['ai_service']
 pdf_generator = PDFGenerator(db_manager)
 
 @app.route('/')
@@ -323,7 +412,7 @@ def handle_projects():
             'type': p[2],
             'created_at': p[3],
             'updated_at': p[4],
-            'settings': json.loads(p[5]) if p[5] else {}
+            'settings': orjson.loads(p[5]) if p[5] else {}
         } for p in projects])
     
     elif request.method == 'POST':
@@ -335,6 +424,41 @@ def handle_projects():
         )
         return jsonify({'project_id': project_id})
 
+def _save_scene_image(image_data, error, image_path):
+    if not image_data:
+        return None, error
+    
+    # Re-encode with optimize so fewer bytes hit the disk and pdflatex;
+    # Pillow releases the GIL while compressing, so saves run in parallel
+    try:
+        with Image.open(BytesIO(image_data)) as image:
+            image.save(image_path, format='PNG', optimize=True)
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        # Truncated or unrecognised model output (UnidentifiedImageError is an OSError)
+        return None, f'Failed to save image: {e}'
+    return image_path, None
+
+def _generate_scene_image(prompt, style, image_path):
+    image_data, error = ai_service.generate_image(prompt, style)
+    return _save_scene_image(image_data, error, image_path)
+
+def _generate_scene_audio(text, audio_path):
+    audio_data, error = ai_service.generate_audio_narration(text)
+    if not audio_data:
+        return None, error
+    
+    with open(audio_path, 'wb') as f:
+        f.write(audio_data)
+    return audio_path, None
+
+def _scene_result(future):
+    # One scene's failure is reported like the services' own errors, so the
+    # other scenes are still saved
+    try:
+        return future.result()
+    except Exception as e:
+        return None, str(e)
+
 @app.route('/api/create-book', methods=['POST'])
 def create_book():
     data = request.get_json()
@@ -369,85 +493,106 @@ def create_book():
         data
     )
     
-    # Generate images for each scene
-    for i, scene in enumerate(story_data['scenes']):
-        # Add text content
-        db_manager.add_content(
-            project_id,
-            'text',
-            text=scene['text'],
-            order_index=i * 2
-        )
+    scenes = story_data['scenes']
+    art_style = data.get('art_style', 'watercolor')
+    # Narration is opt-in; it costs one TTS call and one file write per scene
+    generate_audio = data.get('generate_audio', False)
+    
+    generated_folder = app.config['GENERATED_FOLDER']
+    image_paths = [os.path.join(generated_folder, f"{project_id}_scene_{i}.png") for i in range(len(scenes))]
+    audio_paths = [os.path.join(generated_folder, f"{project_id}_scene_{i}.mp3") for i in range(len(scenes))]
+    
+    # Dispatch every scene's image and audio request at once; they are
+    # independent network round-trips to the AI services, and each worker
+    # also encodes and writes its own file so disk work overlaps the
+    # requests still in flight
+    with ThreadPoolExecutor(max_workers=min(16, len(scenes) * 2)) as executor:
+        audio_futures = [
+            executor.submit(_generate_scene_audio, scene['text'], audio_path) if generate_audio else None
+            for scene, audio_path in zip(scenes, audio_paths)
+        ]
         
-        # Generate and save image
-        image_data, error = ai_service.generate_image(
-            scene['image_prompt'],
-            data.get('art_style', 'watercolor')
-        )
+        image_results = None
+        if data.get('use_batch_api', False):
+            # A single Batch Mode job carries every scene prompt; it is queued
+            # server-side and therefore slower to return, so it is opt-in
+            image_results = ai_service.generate_images_batch(
+                [scene['image_prompt'] for scene in scenes],
+                art_style
+            )
+        elif data.get('use_combined_request', False):
+            # One multi-image request for every scene costs a single request
+            # against the rate limit; the model may return fewer images, which
+            # are then generated one by one, so it is opt-in
+            image_results = ai_service.generate_images_combined(
+                [scene['image_prompt'] for scene in scenes],
+                art_style
+            )
         
-        if image_data:
-            # Save image
-            image_filename = f"{project_id}_scene_{i}.png"
-            image_path = os.path.join(app.config['GENERATED_FOLDER'], image_filename)
-            
-            with open(image_path, 'wb') as f:
-                f.write(base64.b64decode(image_data))
+        if image_results is not None:
+            image_futures = [
+                executor.submit(_save_scene_image, image_data, error, image_path)
+                for (image_data, error), image_path in zip(image_results, image_paths)
+            ]
+        else:
+            image_futures = [
+                executor.submit(_generate_scene_image, scene['image_prompt'], art_style, image_path)
+                for scene, image_path in zip(scenes, image_paths)
+            ]
+        
+        # Content rows are collected here and written in a single transaction
+        content_rows = []
+        
+        for i, scene in enumerate(scenes):
+            audio_path = None
+            if audio_futures[i]:
+                audio_path, error = _scene_result(audio_futures[i])
             
-            db_manager.add_content(
-                project_id,
-                'image',
-                image_path=image_path,
-                order_index=i * 2 + 1
+            # Add text content, with its narration when one was generated
+            content_rows.append(
+                (str(uuid.uuid4()), project_id, 'text', scene['text'], None, audio_path, i * 2)
             )
-            scene['image_url'] = f"/{image_path}" # Add image URL to the scene
-        else:
-            scene['image_url'] = None
-        
-        # Generate audio
-        if data.get('generate_audio', True):
-            audio_data, error = ai_service.generate_audio_narration(scene['text'])
-            if audio_data:
-                audio_filename = f"{project_id}_scene_{i}.mp3"
-                audio_path = os.path.join(app.config['GENERATED_FOLDER'], audio_filename)
-                
-                with open(audio_path, 'wb') as f:
-                    f.write(audio_data)
-                
-                # In a real app, you'd save the audio_path to the database here
+            
+            image_path, error = _scene_result(image_futures[i])
+            
+            if image_path:
+                content_rows.append(
+                    (str(uuid.uuid4()), project_id, 'image', None, image_path, None, i * 2 + 1)
+                )
+                scene['image_url'] = f"/{image_path}" # Add image URL to the scene
+            else:
+                scene['image_url'] = None
+    
+    db_manager.add_content_bulk(content_rows)
     
     return jsonify({
         'project_id': project_id,
         'story': story_data
     })
 
-@app.route('/api/modify-image', methods=['POST'])
-def modify_image():
-    data = request.get_json()
-    
+def _modify_image_impl(data):
+    # Decode the upload once here; the service works on raw bytes
     modified_image, error = ai_service.modify_image(
-        data['image_data'],
+        base64.b64decode(data['image_data']),
         data['modification_prompt']
     )
     
     if error:
-        return jsonify({'error': error}), 500
+        return {'error': error}, 500
     
-    # Encode the image data to base64
-    encoded_image = base64.b64encode(modified_image).decode('utf-8')
+    return {'image': modified_image}, 200
 
-    return jsonify({'image_data': encoded_image})
+def _generated_image_filename(project_id):
+    return f"{project_id}_generated.png"
 
-@app.route('/api/generate-image', methods=['POST'])
-def generate_image():
-    data = request.get_json()
-    
+def _generate_image_impl(data):
     image_data, error = ai_service.generate_image(
         data['prompt'],
         data.get('style', 'watercolor')
     )
     
     if error:
-        return jsonify({'error': error}), 500
+        return {'error': error}, 500
 
     # Create a project for the generated image
     project_id = db_manager.create_project(
@@ -457,14 +602,13 @@ def generate_image():
     )
 
     # Save the image to the generated folder
-    image_filename = f"{project_id}_generated.png"
-    image_path = os.path.join(app.config['GENERATED_FOLDER'], image_filename)
+    image_path = os.path.join(app.config['GENERATED_FOLDER'], _generated_image_filename(project_id))
 
     try:
         with open(image_path, 'wb') as f:
             f.write(image_data)
     except Exception as e:
-        return jsonify({'error': f'Failed to save image: {str(e)}'}), 500
+        return {'error': f'Failed to save image: {str(e)}'}, 500
 
     # Add content to the database
     db_manager.add_content(
@@ -473,44 +617,143 @@ def generate_image():
         image_path=image_path
     )
     
-    # Encode the image data to base64
-    encoded_image = base64.b64encode(image_data).decode('utf-8')
+    # The image itself is fetched from the URL, so no base64 copy is sent
+    return {
+        'project_id': project_id,
+        'url': f'/api/generated/{project_id}.png'
+    }, 200
+
+def _combine_images_impl(data):
+    combined_image, error = ai_service.combine_images(
+        base64.b64decode(data['image1_data']),
+        base64.b64decode(data['image2_data']),
+        data['combination_prompt']
+    )
+    
+    if error:
+        return {'error': error}, 500
+    
+    return {'image': combined_image}, 200
+
+# Image operations that can be queued through /api/batch
+BATCH_OPERATIONS = {
+    'generate_image': _generate_image_impl,
+    'modify_image': _modify_image_impl,
+    'combine_images': _combine_images_impl,
+}
+
+# Shared by all batch requests so concurrent batches don't each spawn a pool
+batch_executor = ThreadPoolExecutor(max_workers=8)
+
+def _run_batch_operation(op):
+    # Bad input fails only its own entry, never the sibling operations
+    if not isinstance(op, dict):
+        return {'error': 'Each operation must be an object'}, 400
+    
+    handler = BATCH_OPERATIONS.get(op.get('type'))
+    if handler is None:
+        return {'error': f"Unknown operation: {op.get('type')}"}, 400
+    
+    try:
+        return handler(op.get('payload') or {})
+    except KeyError as e:
+        return {'error': f'Missing field: {e}'}, 400
+    except (ValueError, TypeError) as e:
+        # Includes binascii.Error from malformed base64 image data
+        return {'error': f'Invalid payload: {e}'}, 400
+    except Exception as e:
+        # Server-side failures (database, disk) also stay with their entry
+        app.logger.exception("Batch operation %r failed", op.get('type'))
+        return {'error': f'Operation failed: {e}'}, 500
+
+def _encode_image_payload(payload):
+    # JSON can't carry bytes, so base64 is only applied at this boundary
+    image = payload.pop('image', None)
+    if image is not None:
+        payload['image_data'] = base64.b64encode(image).decode('ascii')
+    return payload
+
+def _wants_binary_image():
+    # Clients that ask for PNG (Accept header or ?format=binary) get the raw
+    # bytes and skip the base64 encode/decode and its ~33% size overhead
+    return request.args.get('format') == 'binary' or \
+        request.accept_mimetypes.best_match(['application/json', 'image/png']) == 'image/png'
 
-    return jsonify({'image_data': encoded_image})
+def _image_response(payload, status):
+    if status == 200 and _wants_binary_image():
+        return send_file(BytesIO(payload['image']), mimetype='image/png')
+    
+    return jsonify(_encode_image_payload(payload)), status
+
+@app.route('/api/modify-image', methods=['POST'])
+def modify_image():
+    return _image_response(*_modify_image_impl(request.get_json()))
+
+@app.route('/api/generate-image', methods=['POST'])
+def generate_image():
+    payload, status = _generate_image_impl(request.get_json())
+    
+    if status == 200 and _wants_binary_image():
+        response = serve_generated_image(payload['project_id'])
+        response.headers['X-Project-Id'] = payload['project_id']
+        return response
+    
+    return jsonify(payload), status
+
+@app.route('/api/generated/<project_id>.png')
+def serve_generated_image(project_id):
+    # conditional=True adds ETag/Last-Modified and Range support
+    return send_from_directory(
+        app.config['GENERATED_FOLDER'],
+        _generated_image_filename(project_id),
+        mimetype='image/png',
+        conditional=True
+    )
 
 @app.route('/api/combine-images', methods=['POST'])
 def combine_images():
+    return _image_response(*_combine_images_impl(request.get_json()))
+
+@app.route('/api/narrate', methods=['POST'])
+def narrate():
     data = request.get_json()
-    
-    combined_image, error = ai_service.combine_images(
-        data['image1_data'],
-        data['image2_data'],
-        data['combination_prompt']
-    )
+    audio_stream, error = ai_service.stream_audio_narration(data['text'])
     
     if error:
         return jsonify({'error': error}), 500
     
-    return jsonify({'image_data': combined_image})
+    # Forward chunks as they arrive so playback can start before synthesis ends
+    return Response(audio_stream, mimetype='audio/mpeg')
 
-@app.route('/api/generate-pdf/<project_id>')
-def generate_pdf(project_id):
+@app.route('/api/batch', methods=['POST'])
+def batch():
+    data = request.get_json()
+    ops = data.get('ops') if isinstance(data, dict) else None
+    
+    if not isinstance(ops, list):
+        return jsonify({'error': "Request body must contain an 'ops' list"}), 400
+    
+    results = batch_executor.map(_run_batch_operation, ops)
+    
+    return jsonify({'responses': [
+        {'status': status, 'body': _encode_image_payload(payload)} for payload, status in results
+    ]})
+
+def _build_pdf(project_id):
     # Get project to determine the template type
-    conn = sqlite3.connect(db_manager.db_path)
-    cursor = conn.cursor()
+    cursor = db_manager._conn().cursor()
     cursor.execute('SELECT type FROM projects WHERE id = ?', (project_id,))
     project = cursor.fetchone()
-    conn.close()
 
     if not project:
-        return jsonify({'error': 'Project not found'}), 404
+        return None, 'Project not found', 404
 
     template_type = project[0]
     
     latex_code, error = pdf_generator.generate_latex_code(project_id, template_type)
     
     if error:
-        return jsonify({'error': error}), 500
+        return None, error, 500
     
     output_filename = os.path.join(
         app.config['EXPORTS_FOLDER'],
@@ -520,10 +763,124 @@ def generate_pdf(project_id):
     pdf_path, error = pdf_generator.compile_pdf(latex_code, output_filename)
     
     if error:
-        return jsonify({'error': f'PDF Compilation Failed: {error}'}), 500
+        return None, f'PDF Compilation Failed: {error}', 500
+    
+    return pdf_path, None, 200
+
+def _pdf_job_path(job_id):
+    return os.path.join(PDF_JOBS_FOLDER, f'{job_id}.json')
+
+def _write_pdf_job(job_id, state):
+    # Write then rename, so a poll from another worker never reads a partial file
+    path = _pdf_job_path(job_id)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(state))
+    os.replace(tmp_path, path)
+
+def _read_pdf_job(job_id):
+    try:
+        # Only ids we issued name a file; anything else can't escape the folder
+        uuid.UUID(job_id)
+        path = _pdf_job_path(job_id)
+        if os.path.getmtime(path) < time.time() - PDF_JOB_TTL:
+            _forget_pdf_job(job_id)
+            return None
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    except (ValueError, OSError):
+        return None
+
+def _forget_pdf_job(job_id):
+    try:
+        os.remove(_pdf_job_path(job_id))
+    except FileNotFoundError:
+        pass
+
+def _evict_expired_pdf_jobs():
+    # Covers jobs nobody polls, abandoned 202s and PDFs never downloaded.
+    # A state file is rewritten when its build finishes, so its mtime is the
+    # finish time; a pending file this old belongs to a worker that died
+    cutoff = time.time() - PDF_JOB_TTL
+    with os.scandir(PDF_JOBS_FOLDER) as entries:
+        for entry in entries:
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+def _record_pdf_job_result(job_id, future):
+    try:
+        pdf_path, error, status = future.result()
+    except Exception as e:
+        pdf_path, error, status = None, str(e), 500
+    
+    if error:
+        _write_pdf_job(job_id, {'status': 'failed', 'error': error, 'code': status})
+    else:
+        _write_pdf_job(job_id, {'status': 'done', 'pdf_path': pdf_path})
+
+def _track_pdf_job(future):
+    # Only builds a client will poll for get a state file
+    job_id = str(uuid.uuid4())
+    _evict_expired_pdf_jobs()
+    _write_pdf_job(job_id, {'status': 'pending'})
+    # Runs straight away if the build already finished
+    future.add_done_callback(lambda f: _record_pdf_job_result(job_id, f))
+    return job_id
+
+@app.route('/api/generate-pdf/<project_id>')
+def generate_pdf(project_id):
+    future = PDF_EXECUTOR.submit(_build_pdf, project_id)
+    
+    # Deferred mode: hand back the job id and let the client poll
+    if request.args.get('async'):
+        job_id = _track_pdf_job(future)
+        return jsonify({
+            'job_id': job_id,
+            'status_url': f'/api/pdf-status/{job_id}'
+        }), 202
+    
+    try:
+        pdf_path, error, status = future.result(timeout=60)
+    except FuturesTimeoutError:
+        job_id = _track_pdf_job(future)
+        return jsonify({
+            'error': 'PDF generation is still running',
+            'job_id': job_id,
+            'status_url': f'/api/pdf-status/{job_id}'
+        }), 202
+    
+    if error:
+        return jsonify({'error': error}), status
     
     return send_file(pdf_path, as_attachment=True)
 
+@app.route('/api/pdf-status/<job_id>')
+def pdf_status(job_id):
+    job = _read_pdf_job(job_id)
+    
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    if job['status'] == 'pending':
+        return jsonify({'job_id': job_id, 'status': 'pending'})
+    
+    if job['status'] == 'failed':
+        _forget_pdf_job(job_id)
+        return jsonify({'job_id': job_id, 'status': 'failed', 'error': job['error']}), job['code']
+    
+    if request.args.get('download'):
+        _forget_pdf_job(job_id)
+        return send_file(job['pdf_path'], as_attachment=True)
+    
+    return jsonify({
+        'job_id': job_id,
+        'status': 'done',
+        'download_url': f'/api/pdf-status/{job_id}?download=1'
+    })
+
 @app.route('/api/upload', methods=['POST'])
 def upload_file():
     if 'file' not in request.files:
@@ -536,17 +893,20 @@ def upload_file():
     if file:
         filename = secure_filename(file.filename)
         filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
         
-        # Convert to base64 for frontend
-        with open(filepath, 'rb') as f:
-            image_data = base64.b64encode(f.read()).decode()
+        # Read the upload once and reuse the bytes for both the file and the
+        # base64 copy instead of saving and then reading the file back
+        raw = file.stream.read()
+        with open(filepath, 'wb') as f:
+            f.write(raw)
         
         return jsonify({
             'filename': filename,
             'filepath': filepath,
-            'image_data': image_data
+            'url': f"/{filepath}",
+            'image_data': base64.b64encode(raw).decode()
         })
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # Development server only; deploy with gunicorn -c gunicorn.conf.py app:app
+    app.run(debug=os.getenv('FLASK_DEBUG') == '1', host='0.0.0.0', port=5000)
@@ -0,0 +1,22 @@
+import os
+
+# Production entry point: gunicorn -c gunicorn.conf.py app:app
+#
+# gthread workers serve each request on a real OS thread, so the long
+# blocking Gemini/ElevenLabs HTTP calls overlap within one worker. Real
+# threads are what the app is built around: per-thread SQLite connections,
+# the shared asyncio loop in models/ai_service.py, and the thread pools that
+# run Pillow image work in parallel. Do not switch to gevent, whose monkey
+# patching turns all of those into greenlets on a single thread.
+#
+# One worker by default: app.py keeps its state per process. The projects
+# TTL cache is only dropped by writes in its own process, and the template
+# cache is only refreshed by the process that reseeds templates. Concurrency
+# comes from the threads. PDF job state is kept on disk, so polling works
+# with WEB_CONCURRENCY > 1; raise it only with sticky routing or once those
+# caches move out of process.
+worker_class = 'gthread'
+workers = int(os.getenv('WEB_CONCURRENCY', 1))
+threads = int(os.getenv('GUNICORN_THREADS', 16))
+timeout = 120
+bind = os.getenv('BIND', '0.0.0.0:5000')
@@ -1,5 +1,5 @@
-from .database import DatabaseManager
+from .database import DatabaseManager, Project, Content
 from .ai_service import AIService
 from .pdf_generator import PDFGenerator
 
-__all__ = ['DatabaseManager', 'AIService', 'PDFGenerator']
\ No newline at end of file
+__all__ = ['DatabaseManager', 'Project', 'Content', 'AIService', 'PDFGenerator']
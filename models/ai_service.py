@@ -1,66 +1,375 @@
 import os
-import json
+import re
 import time
 import base64
 import asyncio
+import functools
+import inspect
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from typing import Optional, Dict, List, Tuple, Any
+from typing import Optional, Dict, List, Tuple, Any, Union, Annotated, Iterator, AsyncIterator
+import httpx
+import msgspec
+import orjson
 from PIL import Image
 from elevenlabs import VoiceSettings
-from elevenlabs.client import ElevenLabs
+from elevenlabs.client import AsyncElevenLabs
 
 from google import genai
 from google.genai import types
 
+_STYLE_GUIDES = {
+    "watercolor": "hyperrealistic watercolor painting, intricate details, vibrant and rich colors, dramatic lighting, masterful brush strokes, professional art",
+    "comic": "gritty comic book art style, cinematic panels, detailed line work by a master artist like Jim Lee, dynamic action poses, atmospheric coloring",
+    "realistic": "hyperrealistic photograph, 8K resolution, shot on a professional DSLR camera with a prime lens, cinematic lighting, ultra-detailed textures, photorealistic",
+    "cartoon": "feature film animation style, 3D render like Pixar or DreamWorks, expressive characters, beautiful lighting and shading, cinematic composition",
+    "oil-painting": "masterpiece oil painting in the style of the old masters, rich textures, dramatic chiaroscuro lighting, classical composition, incredible detail",
+    "digital-art": "trending on ArtStation, epic digital painting, concept art, highly detailed, by a world-renowned digital artist, volumetric lighting, matte painting"
+}
+
+# Quality and technical specifications appended to every image prompt
+_IMAGE_QUALITY_TRAILER = """. 
+**Technical Quality**: Masterpiece, 8K resolution, ultra-high definition, photorealistic, hyper-detailed, sharp focus, professional color grading, Unreal Engine 5 render.
+**Artistic Elements**: Cinematic lighting, epic composition, dramatic angle, breathtaking, award-winning photography, professional concept art.
+**Negative Prompt**: Avoid blurry, low-quality, cartoonish, simple, amateurish, deformed, disfigured, watermark, signature."""
+
+# Style names come from request data, so the cache is bounded
+@functools.lru_cache(maxsize=32)
+def _style_tail(style: str) -> str:
+    """Return the style and quality suffix shared by every prompt in a style."""
+    style_guide = _STYLE_GUIDES.get(style, _STYLE_GUIDES["realistic"])
+    return f". Art Style: {style_guide}" + _IMAGE_QUALITY_TRAILER
+
+# One event loop for the whole process, kept alive so DNS, TLS and executor
+# state stay warm across calls instead of being rebuilt per batch
+# The loop's default executor only runs blocking image work (see
+# _to_executor); network calls are coroutines on the loop itself
+_LOOP = asyncio.new_event_loop()
+_LOOP.set_default_executor(ThreadPoolExecutor(max_workers=8, thread_name_prefix='ai-service'))
+threading.Thread(target=_LOOP.run_forever, name='ai-service-loop', daemon=True).start()
+
+async def _bounded(semaphore: asyncio.Semaphore, coro):
+    """Await a coroutine while holding a concurrency slot."""
+    async with semaphore:
+        return await coro
+
+# Per-step timing assumptions behind estimate_generation_time, in seconds
+_GENERATION_ESTIMATES = {
+    "story_text": 20,
+    "per_image": 30,   # higher quality takes longer
+    "per_audio": 15
+}
+
+@functools.lru_cache(maxsize=64)
+def _estimate_generation_time(num_scenes: int, generate_audio: bool, generate_images: bool) -> Tuple[int, int, int]:
+    """Compute (total, image, audio) seconds for one request shape.
+    
+    The cache holds an immutable tuple, so no caller can alter another's
+    estimate.
+    """
+    image_time = num_scenes * _GENERATION_ESTIMATES["per_image"] if generate_images else 0
+    audio_time = num_scenes * _GENERATION_ESTIMATES["per_audio"] if generate_audio else 0
+    return _GENERATION_ESTIMATES["story_text"] + image_time + audio_time, image_time, audio_time
+
+# Markdown code fence (```json, ```latex, ...) wrapped around model output
+_FENCE_RE = re.compile(r'\A\s*```[a-zA-Z]*[ \t]*\n?|\n?[ \t]*```\s*\Z')
+
+# Shapes of the JSON documents Gemini is asked to produce; decoding into
+# these validates required fields in the same native pass as parsing. Only
+# the required fields are typed: the model's optional fields vary in shape
+# (null, a string for a list, "1a" for a number), so they pass through as-is
+# rather than failing a whole story over a field nothing depends on
+class Scene(msgspec.Struct):
+    title: str
+    text: str
+    image_prompt: str
+    scene_number: Any = 0
+    key_emotions: Any = []
+    dialogue: Any = ""
+
+class Story(msgspec.Struct):
+    title: str
+    scenes: Annotated[List[Scene], msgspec.Meta(min_length=1)]
+    summary: Any = ""
+
+class Chapter(msgspec.Struct):
+    title: str
+    content: str
+    chapter_number: Any = 0
+    image_suggestions: Any = []
+    key_points: Any = []
+
+class Book(msgspec.Struct):
+    title: str
+    chapters: List[Chapter]
+    subtitle: Any = ""
+    author: Any = ""
+    theme: Any = ""
+    book_type: Any = ""
+    conclusion: Any = ""
+
+# Image inputs may be raw bytes, an already-open image, or base64 text
+ImageInput = Union[bytes, Image.Image, str]
+
+def _image_part(image_data: ImageInput) -> types.Part:
+    """Turn an image input into a request part, base64-decoding only when given text.
+    
+    Encoded bytes are sent as they are: Pillow only reads the header to name
+    the MIME type, so no pixel buffer is decoded. Images passed in already
+    open are encoded to PNG and left open. This is blocking work, so run it
+    through ``_to_executor`` rather than on the service loop.
+    """
+    if isinstance(image_data, Image.Image):
+        buffer = BytesIO()
+        image_data.save(buffer, format='PNG')
+        return types.Part.from_bytes(data=buffer.getvalue(), mime_type='image/png')
+    
+    if not isinstance(image_data, (bytes, bytearray, memoryview)):
+        image_data = base64.b64decode(image_data)
+    image_data = bytes(image_data)
+    with Image.open(BytesIO(image_data)) as image:
+        mime_type = Image.MIME.get(image.format, 'image/png')
+    return types.Part.from_bytes(data=image_data, mime_type=mime_type)
+
+async def _to_executor(func, *args):
+    """Run blocking work on the loop's default executor and await it."""
+    return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
 class RateLimiter:
-    """Simple rate limiter for API calls."""
+    """Sliding-window rate limiter for API calls."""
     
     def __init__(self, max_requests: int = 20, time_window: int = 60):
         self.max_requests = max_requests
         self.time_window = time_window
-        self.requests = []
+        # Fixed ring buffer of request timestamps; they are written in order,
+        # so the oldest live one is always at the head
+        self._times = array('d', [0.0]) * max_requests
+        self._head = 0
+        self._count = 0
+        self._lock = threading.Lock()
+    
+    @property
+    def requests_made(self) -> int:
+        """Number of requests recorded in the current window."""
+        with self._lock:
+            self._evict(time.monotonic())
+            return self._count
+    
+    def _evict(self, now: float) -> None:
+        """Drop requests that fell outside the time window."""
+        while self._count and now - self._times[self._head] >= self.time_window:
+            self._head = (self._head + 1) % self.max_requests
+            self._count -= 1
+    
+    def _record(self, now: float) -> None:
+        """Append a timestamp, overwriting the oldest when the buffer is full."""
+        if self._count == self.max_requests:
+            self._head = (self._head + 1) % self.max_requests
+            self._count -= 1
+        self._times[(self._head + self._count) % self.max_requests] = now
+        self._count += 1
     
     def can_make_request(self) -> bool:
         """Check if a new request can be made."""
-        now = time.time()
-        # Remove old requests outside the time window
-        self.requests = [req_time for req_time in self.requests if now - req_time < self.time_window]
-        
-        return len(self.requests) < self.max_requests
+        with self._lock:
+            self._evict(time.monotonic())
+            return self._count < self.max_requests
     
     def add_request(self) -> None:
         """Record a new request."""
-        self.requests.append(time.time())
+        with self._lock:
+            self._record(time.monotonic())
+    
+    def try_acquire(self, cost: int = 1) -> Tuple[bool, float]:
+        """Atomically check the limit and record ``cost`` requests.
+        
+        Returns whether the requests were allowed and, if not, the seconds
+        until enough of the window frees up.
+        """
+        if cost > self.max_requests:
+            return False, float(self.time_window)
+        
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            
+            overflow = self._count + cost - self.max_requests
+            if overflow <= 0:
+                for _ in range(cost):
+                    self._record(now)
+                return True, 0.0
+            
+            # The request that has to expire before ``cost`` slots are free
+            oldest_blocking = self._times[(self._head + overflow - 1) % self.max_requests]
+            return False, self.time_window - (now - oldest_blocking)
+    
+    def snapshot(self) -> Tuple[bool, int, float]:
+        """Return (can_make_request, requests_made, time_until_next) from one eviction pass."""
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            can = self._count < self.max_requests
+            until = 0.0 if can else self.time_window - (now - self._times[self._head])
+            return can, self._count, until
     
     def time_until_next_request(self) -> float:
         """Get seconds until next request is allowed."""
-        if self.can_make_request():
-            return 0
-        
-        oldest_request = min(self.requests)
-        return self.time_window - (time.time() - oldest_request)
+        with self._lock:
+            now = time.monotonic()
+            self._evict(now)
+            if self._count < self.max_requests:
+                return 0
+            
+            return self.time_window - (now - self._times[self._head])
+
+class ResultCache:
+    """Small thread-safe LRU cache for generated media, keyed by request content.
+    
+    Bounded both by entry count and by ``max_bytes``, the summed ``len()`` of
+    the cached values, since a single image can be several MB.
+    """
+    
+    def __init__(self, max_entries: int = 64, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Build a compact cache key from the request parameters."""
+        raw = orjson.dumps(parts, default=str, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value and mark it as recently used."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: str, value: Any) -> None:
+        """Store a value, evicting least recently used entries past either limit."""
+        size = len(value)
+        if size > self.max_bytes:
+            # Would evict everything else and still not fit
+            return
+        
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= len(previous)
+            self._entries[key] = value
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= len(evicted)
 
 class AIService:
     """Handles all AI service integrations including Gemini and ElevenLabs."""
     
     def __init__(self):
+        # Keep-alive HTTP/2 pools shared by Gemini and ElevenLabs, so the
+        # ~20 requests behind a single book reuse TLS sessions
+        http_limits = httpx.Limits(max_connections=100, max_keepalive_connections=50)
+        http_timeout = httpx.Timeout(120.0, connect=10.0)
+        self._http = httpx.Client(http2=True, limits=http_limits, timeout=http_timeout)
+        # Media calls run as coroutines on one long-lived loop, so concurrent
+        # requests are multiplexed on a single thread instead of a pool
+        self._async_http = httpx.AsyncClient(http2=True, limits=http_limits, timeout=http_timeout)
+        self._gemini_key = os.getenv('GEMINI_API_KEY')
         self.gemini_client = genai.Client(
-            api_key=os.getenv('GEMINI_API_KEY')
+            api_key=self._gemini_key,
+            http_options=types.HttpOptions(
+                httpx_client=self._http,
+                httpx_async_client=self._async_http
+            )
         )
         self.elevenlabs_api_key = os.getenv('ELEVENLABS_API_KEY')
+        self._has_gemini = bool(self._gemini_key)
+        self._has_elevenlabs = bool(self.elevenlabs_api_key)
         self.elevenlabs_voice_id = os.getenv('ELEVENLABS_VOICE_ID', '21m00Tcm4TlvDq8ikWAM') # Jessica's Voice ID
-        self.elevenlabs_client = ElevenLabs(api_key=self.elevenlabs_api_key)
+        self.elevenlabs_client = AsyncElevenLabs(
+            api_key=self.elevenlabs_api_key,
+            httpx_client=self._async_http
+        )
         
         # Rate limiters
         self.image_limiter = RateLimiter(max_requests=20, time_window=60)
         self.text_limiter = RateLimiter(max_requests=50, time_window=60)
         self.audio_limiter = RateLimiter(max_requests=10, time_window=60)
+        
+        # Identical prompts (retries, demos) are served from memory; every
+        # worker process holds its own copy, so the byte budgets are per process
+        self.image_cache = ResultCache(
+            max_entries=64, max_bytes=int(os.getenv('IMAGE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+        )
+        self.audio_cache = ResultCache(
+            max_entries=128, max_bytes=int(os.getenv('AUDIO_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+        )
+    
+    def _run_sync(self, coro):
+        """Run a coroutine on the service loop and block until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coro, _LOOP).result()
+    
+    def _stream_text(self, prompt: str, model: str = "gemini-2.5-flash") -> str:
+        """Stream a text completion, collecting chunks as they arrive."""
+        # Receiving incrementally lets the first tokens land before generation
+        # finishes instead of waiting on one large buffered response
+        chunks = self.gemini_client.models.generate_content_stream(
+            model=model,
+            contents=[types.Content(parts=[types.Part.from_text(text=prompt)])]
+        )
+        return "".join(chunk.text for chunk in chunks if chunk.text)
+    
+    def _call_gemini_text(self,
+                          prompt: str,
+                          empty_error: str,
+                          decode_type: Optional[type] = None,
+                          model: str = "gemini-2.5-flash") -> Tuple[Optional[Any], Optional[str]]:
+        """Run a rate-limited text completion and strip any code fence.
+        
+        With ``decode_type`` the reply is decoded and validated into that
+        Struct and returned as plain dicts; otherwise the text is returned.
+        Decode errors propagate so callers can word their own messages.
+        """
+        allowed, _ = self.text_limiter.try_acquire()
+        if not allowed:
+            return None, "Text generation rate limit exceeded"
+        
+        text = self._stream_text(prompt, model)
+        if not text:
+            return None, empty_error
+        
+        text = _FENCE_RE.sub('', text)
+        if decode_type is None:
+            return text.strip(), None
+        
+        # Lax mode accepts numbers the model sends as strings
+        return msgspec.to_builtins(msgspec.json.decode(text, type=decode_type, strict=False)), None
+    
+    def _iterate_sync(self, agen: AsyncIterator[Any]) -> Iterator[Any]:
+        """Drive an async generator on the service loop from synchronous code."""
+        try:
+            while True:
+                try:
+                    yield self._run_sync(agen.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            self._run_sync(agen.aclose())
     
     def check_api_keys(self) -> Dict[str, bool]:
         """Check if required API keys are configured."""
         return {
-            'gemini': bool(os.getenv('GEMINI_API_KEY')),
-            'elevenlabs': bool(os.getenv('ELEVENLABS_API_KEY'))
+            'gemini': self._has_gemini,
+            'elevenlabs': self._has_elevenlabs
         }
     
     def generate_story_structure(self, 
@@ -71,9 +380,6 @@ class AIService:
                                      num_scenes: int = 3) -> Optional[Dict[str, Any]]:
         """Generate a complete story structure with scenes."""
         
-        if not self.text_limiter.can_make_request():
-            return None, "Text generation rate limit exceeded"
-        
         prompt = f"""
         Create a sophisticated {num_scenes}-scene story with these elements:
         
@@ -107,72 +413,44 @@ class AIService:
         """
         
         try:
-            response = self.gemini_client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[types.Content(parts=[types.Part.from_text(text=prompt)])]
-            )
-            
-            self.text_limiter.add_request()
-            
-            if response and response.candidates and response.candidates[0].content:
-                text = response.candidates[0].content.parts[0].text
-                
-                # Clean and parse JSON response
-                text = text.strip()
-                if text.startswith('```json'):
-                    text = text[7:]
-                if text.endswith('```'):
-                    text = text[:-3]
-                
-                story_data = json.loads(text.strip())
-                
-                # Validate the structure
-                if self._validate_story_structure(story_data):
-                    return story_data, None
-                else:
-                    return None, "Invalid story structure generated"
-            return None, "Failed to generate story"
+            return self._call_gemini_text(prompt, "Failed to generate story", decode_type=Story)
 
+        except msgspec.ValidationError as e:
+            return None, f"Invalid story structure generated: {str(e)}"
         except Exception as e:
             return None, f"Story generation error: {str(e)}"
     
-    def _validate_story_structure(self, story_data: Dict) -> bool:
-        """Validate the generated story structure."""
-        required_keys = ['title', 'scenes']
-        if not all(key in story_data for key in required_keys):
-            return False
-        
-        if not isinstance(story_data['scenes'], list) or not story_data['scenes']:
-            return False
-        
-        for scene in story_data['scenes']:
-            required_scene_keys = ['title', 'text', 'image_prompt']
-            if not all(key in scene for key in required_scene_keys):
-                return False
-        
-        return True
-    
     def generate_image(self, 
                            prompt: str, 
                            style: str = "realistic",
                            character_consistency: Optional[Dict] = None) -> Tuple[Optional[str], Optional[str]]:
         """Generate an image based on text prompt."""
-        
-        if not self.image_limiter.can_make_request():
-            wait_time = self.image_limiter.time_until_next_request()
-            return None, f"Image generation rate limit exceeded. Try again in {int(wait_time)} seconds."
+        return self._run_sync(self.agenerate_image(prompt, style, character_consistency))
+    
+    async def agenerate_image(self, 
+                              prompt: str, 
+                              style: str = "realistic",
+                              character_consistency: Optional[Dict] = None) -> Tuple[Optional[str], Optional[str]]:
+        """Generate an image based on text prompt without blocking the loop."""
         
         # Enhanced prompt with style and consistency
         full_prompt = self._build_image_prompt(prompt, style, character_consistency)
         
+        cache_key = ResultCache.make_key(full_prompt)
+        cached_image = self.image_cache.get(cache_key)
+        if cached_image is not None:
+            return cached_image, None
+        
+        allowed, wait_time = self.image_limiter.try_acquire()
+        if not allowed:
+            return None, f"Image generation rate limit exceeded. Try again in {int(wait_time)} seconds."
+        
         try:
-            response = self.gemini_client.models.generate_content(
+            response = await self.gemini_client.aio.models.generate_content(
                 model="gemini-2.5-flash-image-preview",
                 contents=[full_prompt]
             )
             
-            self.image_limiter.add_request()
-            
             image_parts = [
                 part.inline_data.data
                 for part in response.candidates[0].content.parts
@@ -180,28 +458,177 @@ class AIService:
             ]
             
             if image_parts:
+                self.image_cache.put(cache_key, image_parts[0])
                 return image_parts[0], None
             return None, "Failed to generate image"
 
         except Exception as e:
             return None, f"Image generation error: {str(e)}"
     
+    def generate_images_batch(self,
+                              prompts: List[str],
+                              style: str = "realistic",
+                              poll_interval: float = 5.0,
+                              timeout: float = 90.0) -> List[Tuple[Optional[bytes], Optional[str]]]:
+        """Generate one image per prompt with a single Gemini Batch Mode job.
+        
+        This blocks the calling request thread while it polls, so ``timeout``
+        defaults to just under gunicorn's 120 s worker timeout. A job still
+        running at the deadline, or whose polling fails, is cancelled so it
+        is not left queued and billed.
+        """
+        
+        if not prompts:
+            return []
+        
+        allowed, wait_time = self.image_limiter.try_acquire()
+        if not allowed:
+            error = f"Image generation rate limit exceeded. Try again in {int(wait_time)} seconds."
+            return [(None, error)] * len(prompts)
+        
+        inlined_requests = [
+            {
+                'contents': [{'parts': [{'text': self._build_image_prompt(prompt, style)}], 'role': 'user'}],
+                'metadata': {'key': f"scene_{i}"}
+            }
+            for i, prompt in enumerate(prompts)
+        ]
+        
+        try:
+            batch_job = self.gemini_client.batches.create(
+                model="gemini-2.5-flash-image-preview",
+                src=inlined_requests,
+                config={'display_name': f"storyweaver-images-{int(time.time())}"}
+            )
+        except Exception as e:
+            return [(None, f"Image batch generation error: {str(e)}")] * len(prompts)
+        
+        try:
+            # Batch jobs are queued server-side, so poll until they settle
+            finished_states = {'JOB_STATE_SUCCEEDED', 'JOB_STATE_FAILED', 'JOB_STATE_CANCELLED', 'JOB_STATE_EXPIRED'}
+            deadline = time.monotonic() + timeout
+            while batch_job.state.name not in finished_states:
+                if time.monotonic() > deadline:
+                    self._cancel_batch_job(batch_job.name)
+                    return [(None, "Image batch job timed out")] * len(prompts)
+                time.sleep(poll_interval)
+                batch_job = self.gemini_client.batches.get(name=batch_job.name)
+            
+            if batch_job.state.name != 'JOB_STATE_SUCCEEDED':
+                return [(None, f"Image batch job ended with {batch_job.state.name}")] * len(prompts)
+            
+            inlined_responses = batch_job.dest.inlined_responses or []
+        except Exception as e:
+            self._cancel_batch_job(batch_job.name)
+            return [(None, f"Image batch generation error: {str(e)}")] * len(prompts)
+        
+        # Each response is unpacked on its own, so one malformed entry does
+        # not discard the images that did come back
+        results = [(None, "Failed to generate image")] * len(prompts)
+        for position, inlined in enumerate(inlined_responses):
+            index = self._batch_response_index(inlined, position, len(prompts))
+            if index is not None:
+                results[index] = self._batch_response_image(inlined)
+        return results
+    
+    def _cancel_batch_job(self, name: str) -> None:
+        """Cancel a Batch Mode job we stopped waiting for; best effort."""
+        try:
+            self.gemini_client.batches.cancel(name=name)
+        except Exception:
+            # Already finished, or the API is unreachable; nothing else to do
+            pass
+    
+    @staticmethod
+    def _batch_response_index(inlined: Any, position: int, count: int) -> Optional[int]:
+        """Map a Batch Mode response to its prompt, by echoed key or by position."""
+        # Responses come back in request order; prefer the key when echoed
+        metadata = getattr(inlined, 'metadata', None) or {}
+        try:
+            index = int(metadata['key'].rsplit('_', 1)[1])
+        except (KeyError, IndexError, ValueError, TypeError, AttributeError):
+            index = position
+        return index if 0 <= index < count else None
+    
+    @staticmethod
+    def _batch_response_image(inlined: Any) -> Tuple[Optional[bytes], Optional[str]]:
+        """Extract one Batch Mode response's image, or the reason it has none."""
+        if getattr(inlined, 'error', None):
+            return None, f"Image generation error: {inlined.error}"
+        
+        response = getattr(inlined, 'response', None)
+        candidates = getattr(response, 'candidates', None)
+        if not candidates or not candidates[0].content or not candidates[0].content.parts:
+            return None, "Failed to generate image"
+        
+        image_parts = [
+            part.inline_data.data
+            for part in candidates[0].content.parts
+            if part.inline_data
+        ]
+        if image_parts:
+            return image_parts[0], None
+        return None, "Failed to generate image"
+    
+    def generate_images_combined(self,
+                                 prompts: List[str],
+                                 style: str = "realistic") -> List[Tuple[Optional[bytes], Optional[str]]]:
+        """Generate one image per prompt from a single multi-image Gemini request."""
+        return self._run_sync(self.agenerate_images_combined(prompts, style))
+    
+    async def agenerate_images_combined(self,
+                                        prompts: List[str],
+                                        style: str = "realistic") -> List[Tuple[Optional[bytes], Optional[str]]]:
+        """Generate one image per prompt from a single request, filling gaps per prompt."""
+        
+        if not prompts:
+            return []
+        
+        # The whole set costs one request against the limiter
+        allowed, wait_time = self.image_limiter.try_acquire()
+        if not allowed:
+            error = f"Image generation rate limit exceeded. Try again in {int(wait_time)} seconds."
+            return [(None, error)] * len(prompts)
+        
+        numbered = "\n".join(f"{i}. {prompt}" for i, prompt in enumerate(prompts, 1))
+        # The style guide and quality trailer are sent once for all prompts
+        full_prompt = (
+            f"Generate {len(prompts)} separate images, one for each numbered description below, "
+            f"in the same order. Return exactly one image per description.\n{numbered}\n"
+            f"Apply to every image{_style_tail(style)}"
+        )
+        
+        images = []
+        try:
+            response = await self.gemini_client.aio.models.generate_content(
+                model="gemini-2.5-flash-image-preview",
+                contents=[full_prompt]
+            )
+            
+            images = [
+                part.inline_data.data
+                for part in response.candidates[0].content.parts
+                if part.inline_data
+            ][:len(prompts)]
+        except Exception:
+            # Every prompt falls back to its own request below
+            pass
+        
+        results = [(image, None) for image in images]
+        
+        # The model may return fewer images than asked for; generate the rest individually
+        missing = prompts[len(images):]
+        if missing:
+            results.extend(await self.abatch_generate_images(missing, style))
+        return results
+    
     def _build_image_prompt(self, 
                           base_prompt: str, 
                           style: str,
                           character_consistency: Optional[Dict] = None) -> str:
         """Build an enhanced image generation prompt."""
         
-        style_guides = {
-            "watercolor": "hyperrealistic watercolor painting, intricate details, vibrant and rich colors, dramatic lighting, masterful brush strokes, professional art",
-            "comic": "gritty comic book art style, cinematic panels, detailed line work by a master artist like Jim Lee, dynamic action poses, atmospheric coloring",
-            "realistic": "hyperrealistic photograph, 8K resolution, shot on a professional DSLR camera with a prime lens, cinematic lighting, ultra-detailed textures, photorealistic",
-            "cartoon": "feature film animation style, 3D render like Pixar or DreamWorks, expressive characters, beautiful lighting and shading, cinematic composition",
-            "oil-painting": "masterpiece oil painting in the style of the old masters, rich textures, dramatic chiaroscuro lighting, classical composition, incredible detail",
-            "digital-art": "trending on ArtStation, epic digital painting, concept art, highly detailed, by a world-renowned digital artist, volumetric lighting, matte painting"
-        }
-        
-        enhanced_prompt = base_prompt
+        parts = [base_prompt]
         
         # Add character consistency if provided
         if character_consistency:
@@ -212,46 +639,43 @@ class AIService:
                 consistency_details.append(f"The character must be wearing: {character_consistency['clothing']}")
             
             if consistency_details:
-                enhanced_prompt += f". {'. '.join(consistency_details)}"
+                parts.append(". ")
+                parts.append(". ".join(consistency_details))
         
-        # Add style guide
-        style_guide = style_guides.get(style, style_guides["realistic"])
-        enhanced_prompt += f". Art Style: {style_guide}"
-        
-        # Add quality and technical specifications for powerful, advanced images
-        enhanced_prompt += """. 
-**Technical Quality**: Masterpiece, 8K resolution, ultra-high definition, photorealistic, hyper-detailed, sharp focus, professional color grading, Unreal Engine 5 render.
-**Artistic Elements**: Cinematic lighting, epic composition, dramatic angle, breathtaking, award-winning photography, professional concept art.
-**Negative Prompt**: Avoid blurry, low-quality, cartoonish, simple, amateurish, deformed, disfigured, watermark, signature."""
-        
-        return enhanced_prompt
+        # Style guide and quality trailer are identical for every prompt in a style
+        parts.append(_style_tail(style))
+        return "".join(parts)
     
     def modify_image(self, 
-                         image_data: str, 
+                         image_data: ImageInput, 
                          modification_prompt: str,
                          preserve_style: bool = True) -> Tuple[Optional[str], Optional[str]]:
         """Modify an existing image based on instructions."""
-        
-        if not self.image_limiter.can_make_request():
-            wait_time = self.image_limiter.time_until_next_request()
+        return self._run_sync(self.amodify_image(image_data, modification_prompt, preserve_style))
+    
+    async def amodify_image(self, 
+                            image_data: ImageInput, 
+                            modification_prompt: str,
+                            preserve_style: bool = True) -> Tuple[Optional[str], Optional[str]]:
+        """Modify an existing image based on instructions without blocking the loop."""
+        
+        allowed, wait_time = self.image_limiter.try_acquire()
+        if not allowed:
             return None, f"Image modification rate limit exceeded. Try again in {int(wait_time)} seconds."
         
         try:
-            # Convert base64 to PIL Image
-            image = Image.open(BytesIO(base64.b64decode(image_data)))
-            
             # Build modification prompt
             full_prompt = modification_prompt
             if preserve_style:
                 full_prompt += ". Enhance the image while strictly maintaining the original art style, color palette, and core composition. The modification should be seamless, photorealistic, and of the highest quality, matching the detail and lighting of the source image. The final result should be 8K resolution."
             
-            response = self.gemini_client.models.generate_content(
+            # Decoding and encoding stay off the loop so other requests keep running
+            image = await _to_executor(_image_part, image_data)
+            response = await self.gemini_client.aio.models.generate_content(
                 model="gemini-2.5-flash-image-preview",
                 contents=[full_prompt, image]
             )
             
-            self.image_limiter.add_request()
-            
             image_parts = [
                 part.inline_data.data
                 for part in response.candidates[0].content.parts
@@ -266,26 +690,32 @@ class AIService:
             return None, f"Image modification error: {str(e)}"
     
     def combine_images(self, 
-                           image1_data: str, 
-                           image2_data: str, 
+                           image1_data: ImageInput, 
+                           image2_data: ImageInput, 
                            combination_prompt: str) -> Tuple[Optional[str], Optional[str]]:
         """Combine two images based on instructions."""
-        
-        if not self.image_limiter.can_make_request():
-            wait_time = self.image_limiter.time_until_next_request()
+        return self._run_sync(self.acombine_images(image1_data, image2_data, combination_prompt))
+    
+    async def acombine_images(self, 
+                              image1_data: ImageInput, 
+                              image2_data: ImageInput, 
+                              combination_prompt: str) -> Tuple[Optional[str], Optional[str]]:
+        """Combine two images based on instructions without blocking the loop."""
+        
+        allowed, wait_time = self.image_limiter.try_acquire()
+        if not allowed:
             return None, f"Image combination rate limit exceeded. Try again in {int(wait_time)} seconds."
         
         try:
-            image1 = Image.open(BytesIO(base64.b64decode(image1_data)))
-            image2 = Image.open(BytesIO(base64.b64decode(image2_data)))
-            
-            response = self.gemini_client.models.generate_content(
+            image1, image2 = await asyncio.gather(
+                _to_executor(_image_part, image1_data),
+                _to_executor(_image_part, image2_data)
+            )
+            response = await self.gemini_client.aio.models.generate_content(
                 model="gemini-2.5-flash-image-preview",
                 contents=[image1, image2, combination_prompt]
             )
             
-            self.image_limiter.add_request()
-            
             image_parts = [
                 part.inline_data.data
                 for part in response.candidates[0].content.parts
@@ -300,8 +730,8 @@ class AIService:
             return None, f"Image combination error: {str(e)}"
     
     def add_logo_to_image(self, 
-                              base_image_data: str, 
-                              logo_image_data: str, 
+                              base_image_data: ImageInput, 
+                              logo_image_data: ImageInput, 
                               placement_instructions: str = "Place the logo appropriately on the clothing/product") -> Tuple[Optional[str], Optional[str]]:
         """Add a logo to an existing image."""
         
@@ -321,48 +751,92 @@ class AIService:
                                      text: str, 
                                      voice_settings: Optional[Dict] = None) -> Tuple[Optional[bytes], Optional[str]]:
         """Generate audio narration using ElevenLabs API."""
+        return self._run_sync(self.agenerate_audio_narration(text, voice_settings))
+    
+    async def agenerate_audio_narration(self, 
+                                        text: str, 
+                                        voice_settings: Optional[Dict] = None) -> Tuple[Optional[bytes], Optional[str]]:
+        """Generate audio narration using ElevenLabs API without blocking the loop."""
         
-        if not self.audio_limiter.can_make_request():
-            wait_time = self.audio_limiter.time_until_next_request()
-            return None, f"Audio generation rate limit exceeded. Try again in {int(wait_time)} seconds."
+        cache_key = ResultCache.make_key(text, self.elevenlabs_voice_id, voice_settings)
+        cached_audio = self.audio_cache.get(cache_key)
+        if cached_audio is not None:
+            return cached_audio, None
         
-        if not self.elevenlabs_api_key:
-            return None, "ElevenLabs API key not configured"
+        error = self._reserve_audio_request()
+        if error:
+            return None, error
         
         try:
-            # Default voice settings optimized for storytelling
-            default_settings = {
-                "stability": 0.6,
-                "similarity_boost": 0.8,
-                "style": 0.2,
-                "use_speaker_boost": True
-            }
-            
-            if voice_settings:
-                default_settings.update(voice_settings)
-
-            response = self.elevenlabs_client.text_to_speech.stream(
-                voice_id=self.elevenlabs_voice_id,
-                output_format="mp3_22050_32",
-                text=text,
-                model_id="eleven_multilingual_v2",
-                voice_settings=VoiceSettings(**default_settings),
-            )
-
-            self.audio_limiter.add_request()
-
-            # Stream the audio into a BytesIO object
-            audio_stream = BytesIO()
-            for chunk in response:
-                if chunk:
-                    audio_stream.write(chunk)
-            
-            audio_stream.seek(0)
-            return audio_stream.read(), None
+            audio_data = b"".join([chunk async for chunk in self._astream_audio_chunks(text, voice_settings)])
+            self.audio_cache.put(cache_key, audio_data)
+            return audio_data, None
 
         except Exception as e:
             return None, f"Audio generation error: {str(e)}"
     
+    def stream_audio_narration(self, 
+                               text: str, 
+                               voice_settings: Optional[Dict] = None) -> Tuple[Optional[Iterator[bytes]], Optional[str]]:
+        """Stream audio narration chunks as ElevenLabs produces them.
+        
+        The key and rate limit are checked before returning, so errors are
+        reported up front rather than midway through a streamed response.
+        """
+        
+        cache_key = ResultCache.make_key(text, self.elevenlabs_voice_id, voice_settings)
+        cached_audio = self.audio_cache.get(cache_key)
+        if cached_audio is not None:
+            return iter((cached_audio,)), None
+        
+        error = self._reserve_audio_request()
+        if error:
+            return None, error
+        
+        return self._iterate_sync(self._astream_audio_chunks(text, voice_settings)), None
+    
+    def _reserve_audio_request(self) -> Optional[str]:
+        """Check the ElevenLabs key and take an audio rate-limit slot."""
+        if not self.elevenlabs_api_key:
+            return "ElevenLabs API key not configured"
+        
+        allowed, wait_time = self.audio_limiter.try_acquire()
+        if not allowed:
+            return f"Audio generation rate limit exceeded. Try again in {int(wait_time)} seconds."
+        return None
+    
+    async def _astream_audio_chunks(self, 
+                                    text: str, 
+                                    voice_settings: Optional[Dict] = None) -> AsyncIterator[bytes]:
+        """Yield non-empty mp3 chunks from the low-latency ElevenLabs stream."""
+        
+        # Default voice settings optimized for storytelling
+        default_settings = {
+            "stability": 0.6,
+            "similarity_boost": 0.8,
+            "style": 0.2,
+            "use_speaker_boost": True
+        }
+        
+        if voice_settings:
+            default_settings.update(voice_settings)
+
+        response = self.elevenlabs_client.text_to_speech.stream(
+            voice_id=self.elevenlabs_voice_id,
+            output_format="mp3_22050_32",
+            text=text,
+            model_id="eleven_turbo_v2_5",
+            optimize_streaming_latency=3,
+            voice_settings=VoiceSettings(**default_settings),
+        )
+        # Depending on the SDK release the stream is returned directly or awaited
+        if inspect.isawaitable(response):
+            response = await response
+
+        async for chunk in response:
+            if chunk:
+                yield chunk
+    
     def generate_book_content(self, 
                                   title: str, 
                                   book_type: str,
@@ -370,9 +844,6 @@ class AIService:
                                   chapter_count: int = 5) -> Tuple[Optional[Dict], Optional[str]]:
         """Generate structured book content."""
         
-        if not self.text_limiter.can_make_request():
-            return None, "Text generation rate limit exceeded"
-        
         prompt = f"""
         Create a sophisticated {book_type} book titled "{title}" with the following specifications:
         
@@ -403,28 +874,11 @@ class AIService:
         """
         
         try:
-            response = self.gemini_client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[types.Content(parts=[types.Part.from_text(text=prompt)])]
-            )
-            
-            self.text_limiter.add_request()
-            
-            if response and response.candidates and response.candidates[0].content:
-                text = response.candidates[0].content.parts[0].text
-                
-                # Clean and parse JSON response
-                text = text.strip()
-                if text.startswith('```json'):
-                    text = text[7:]
-                if text.endswith('```'):
-                    text = text[:-3]
-                
-                book_data = json.loads(text.strip())
-                return book_data, None
-            return None, "Failed to generate book content"
+            return self._call_gemini_text(prompt, "Failed to generate book content", decode_type=Book)
 
-        except json.JSONDecodeError as e:
+        except msgspec.ValidationError as e:
+            return None, f"Invalid book structure generated: {str(e)}"
+        except msgspec.DecodeError as e:
             return None, f"Failed to parse book JSON: {str(e)}"
         except Exception as e:
             return None, f"Book generation error: {str(e)}"
@@ -434,14 +888,11 @@ class AIService:
                                         template_type: str = "storybook") -> Tuple[Optional[str], Optional[str]]:
         """Generate LaTeX code from book content."""
         
-        if not self.text_limiter.can_make_request():
-            return None, "Text generation rate limit exceeded"
-        
         prompt = f"""
         Convert the following book data into professionally formatted LaTeX code using a modern, elegant {template_type} style:
         
         Book Data:
-        {json.dumps(book_data, indent=2)}
+        {orjson.dumps(book_data, option=orjson.OPT_INDENT_2).decode()}
         
         Requirements:
         - Use a professional LaTeX document class (like memoir or KOMA-Script) and relevant packages (graphicx, geometry, etc.).
@@ -455,26 +906,7 @@ class AIService:
         """
         
         try:
-            response = self.gemini_client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[types.Content(parts=[types.Part.from_text(text=prompt)])]
-            )
-            
-            self.text_limiter.add_request()
-            
-            if response and response.candidates and response.candidates[0].content:
-                latex_code = response.candidates[0].content.parts[0].text.strip()
-                
-                # Clean up the LaTeX code
-                if latex_code.startswith('```latex'):
-                    latex_code = latex_code[8:]
-                if latex_code.startswith('```'):
-                    latex_code = latex_code[3:]
-                if latex_code.endswith('```'):
-                    latex_code = latex_code[:-3]
-                
-                return latex_code.strip(), None
-            return None, "Failed to generate LaTeX code"
+            return self._call_gemini_text(prompt, "Failed to generate LaTeX code")
 
         except Exception as e:
             return None, f"LaTeX generation error: {str(e)}"
@@ -497,86 +929,56 @@ class AIService:
     
     def get_rate_limit_status(self) -> Dict[str, Any]:
         """Get current rate limit status for all services."""
-        return {
-            "image_generation": {
-                "can_make_request": self.image_limiter.can_make_request(),
-                "requests_made": len(self.image_limiter.requests),
-                "max_requests": self.image_limiter.max_requests,
-                "time_until_reset": max(0, self.image_limiter.time_until_next_request())
-            },
-            "text_generation": {
-                "can_make_request": self.text_limiter.can_make_request(),
-                "requests_made": len(self.text_limiter.requests),
-                "max_requests": self.text_limiter.max_requests,
-                "time_until_reset": max(0, self.text_limiter.time_until_next_request())
-            },
-            "audio_generation": {
-                "can_make_request": self.audio_limiter.can_make_request(),
-                "requests_made": len(self.audio_limiter.requests),
-                "max_requests": self.audio_limiter.max_requests,
-                "time_until_reset": max(0, self.audio_limiter.time_until_next_request())
+        status = {}
+        for name, limiter in (("image_generation", self.image_limiter),
+                              ("text_generation", self.text_limiter),
+                              ("audio_generation", self.audio_limiter)):
+            # One consistent reading per limiter
+            can_make_request, requests_made, time_until_reset = limiter.snapshot()
+            status[name] = {
+                "can_make_request": can_make_request,
+                "requests_made": requests_made,
+                "max_requests": limiter.max_requests,
+                "time_until_reset": max(0, time_until_reset)
             }
-        }
+        return status
     
     def batch_generate_images(self, 
                                   prompts: List[str], 
                                   style: str = "realistic",
                                   max_concurrent: int = 3) -> List[Tuple[Optional[str], Optional[str]]]:
         """Generate multiple images with controlled concurrency."""
-        
-        # This function uses asyncio which might be complex in a standard Flask setup.
-        # It's recommended to run this in a separate thread or with an async-capable server (like Uvicorn).
-        async def run_batch():
-            semaphore = asyncio.Semaphore(max_concurrent)
-            
-            async def generate_single(prompt):
-                async with semaphore:
-                    # In an async context, we'd ideally use an async version of the Gemini client.
-                    # For simplicity, we run the synchronous function in a thread pool.
-                    loop = asyncio.get_event_loop()
-                    return await loop.run_in_executor(
-                        None, self.generate_image, prompt, style
-                    )
-
-            tasks = [generate_single(prompt) for prompt in prompts]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            processed_results = []
-            for result in results:
-                if isinstance(result, Exception):
-                    processed_results.append((None, str(result)))
-                else:
-                    processed_results.append(result)
-            return processed_results
-
-        return asyncio.run(run_batch())
-    
-    def estimate_generation_time(self, 
-                               num_scenes: int, 
-                               generate_audio: bool = True,
-                               generate_images: bool = True) -> Dict[str, float]:
-        """Estimate time for content generation."""
-        
-        estimates = {
-            "story_text": 20,  # seconds
-            "per_image": 30,   # seconds per image (higher quality takes longer)
-            "per_audio": 15    # seconds per audio clip
-        }
-        
-        total_time = estimates["story_text"]
-        
-        if generate_images:
-            total_time += num_scenes * estimates["per_image"]
-        
-        if generate_audio:
-            total_time += num_scenes * estimates["per_audio"]
+        return self._run_sync(self.abatch_generate_images(prompts, style, max_concurrent))
+    
+    async def abatch_generate_images(self, 
+                                     prompts: List[str], 
+                                     style: str = "realistic",
+                                     max_concurrent: int = 3) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Generate multiple images with controlled concurrency on the service loop.
+        
+        Each image is a coroutine on the shared loop, so ``max_concurrent``
+        is a semaphore over one gather rather than a thread pool's size.
+        """
+        semaphore = asyncio.Semaphore(max_concurrent)
+        results = await asyncio.gather(
+            *(_bounded(semaphore, self.agenerate_image(prompt, style)) for prompt in prompts),
+            return_exceptions=True
+        )
+        return [(None, str(result)) if isinstance(result, Exception) else result for result in results]
+    
+    @staticmethod
+    def estimate_generation_time(num_scenes: int, 
+                                 generate_audio: bool = True,
+                                 generate_images: bool = True) -> Dict[str, float]:
+        """Estimate time for content generation; each call gets its own dict."""
+        total_time, image_time, audio_time = _estimate_generation_time(num_scenes, generate_audio, generate_images)
         
         return {
             "estimated_seconds": total_time,
             "estimated_minutes": round(total_time / 60, 1),
             "breakdown": {
-                "story_generation": estimates["story_text"],
-                "image_generation": num_scenes * estimates["per_image"] if generate_images else 0,
-                "audio_generation": num_scenes * estimates["per_audio"] if generate_audio else 0
+                "story_generation": _GENERATION_ESTIMATES["story_text"],
+                "image_generation": image_time,
+                "audio_generation": audio_time
             }
-        }
\ No newline at end of file
+        }
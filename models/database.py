@@ -1,88 +1,171 @@
 import os
-import json
-import uuid
+import queue
+import atexit
+import contextlib
+import itertools
+import logging
+import time
 import sqlite3
+import threading
+import orjson
+from collections.abc import Mapping
+from concurrent.futures import Future
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Iterator, Callable, ClassVar
 
-class DatabaseManager:
-    """Handles all database operations for the StoryWeaver AI application."""
+logger = logging.getLogger(__name__)
+
+def _to_json(value: Any) -> Optional[str]:
+    """Serialize a settings/metadata value for a TEXT column.
     
-    def __init__(self, db_path: str = 'storyweaver.db'):
-        self.db_path = db_path
-        self.init_database()
+    Empty values are stored as NULL; readers map NULL back to ``{}``
+    without a parse.
+    """
+    return orjson.dumps(value).decode('utf-8') if value else None
+
+_loads = orjson.loads
+
+_CROCKFORD_BASE32 = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_ULID_RANDOM_MASK = (1 << 80) - 1
+
+# Last (timestamp, randomness) handed out, so IDs from separate calls within
+# one millisecond still increase
+_ulid_state = (0, 0)
+_ulid_lock = threading.Lock()
+
+def _new_ulids(count: int) -> List[str]:
+    """Generate ``count`` monotonic ULIDs.
     
-    def init_database(self) -> None:
-        """Initialize the database with required tables."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Projects table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS projects (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                type TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                settings TEXT DEFAULT '{}',
-                status TEXT DEFAULT 'active'
-            )
-        ''')
-        
-        # Content table for storing story scenes, images, audio
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS content (
-                id TEXT PRIMARY KEY,
-                project_id TEXT,
-                type TEXT NOT NULL,
-                content_text TEXT,
-                image_path TEXT,
-                audio_path TEXT,
-                order_index INTEGER DEFAULT 0,
-                metadata TEXT DEFAULT '{}',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE
-            )
-        ''')
-        
-        # Templates table for LaTeX templates
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS templates (
-                id TEXT PRIMARY KEY,
-                name TEXT NOT NULL,
-                type TEXT NOT NULL,
-                latex_template TEXT NOT NULL,
-                description TEXT,
-                is_default BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # User sessions table (for future multi-user support)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_sessions (
-                id TEXT PRIMARY KEY,
-                session_data TEXT DEFAULT '{}',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        conn.commit()
-        conn.close()
+    ULIDs sort by creation time, so new rows land at the right edge of the
+    primary-key B-tree instead of at random pages as uuid4 keys do. Within
+    a millisecond the randomness of the previous ID is incremented, as the
+    ULID monotonic spec requires, so IDs also sort in creation order across
+    calls and threads.
+    """
+    global _ulid_state
+    with _ulid_lock:
+        last_timestamp, last_randomness = _ulid_state
+        timestamp = time.time_ns() // 1_000_000
+        if timestamp > last_timestamp:
+            randomness = int.from_bytes(os.urandom(10), 'big')
+        else:
+            # Same millisecond, or the clock stepped back: continue the sequence
+            timestamp, randomness = last_timestamp, last_randomness + 1
         
-        self.insert_default_templates()
+        values = []
+        for _ in range(count):
+            if randomness > _ULID_RANDOM_MASK:
+                # 80 bits used up within one millisecond; borrow the next one
+                timestamp, randomness = timestamp + 1, 0
+            values.append((timestamp << 80) | randomness)
+            randomness += 1
+        _ulid_state = (timestamp, randomness - 1)
     
-    def insert_default_templates(self) -> None:
-        """Insert default LaTeX templates."""
-        templates = [
-            {
-                'id': 'children_storybook',
-                'name': 'Children\'s Storybook',
-                'type': 'story',
-                'description': 'Colorful and engaging template for children\'s stories',
-                'template': '''\\documentclass[a4paper,12pt]{book}
+    return [''.join(_CROCKFORD_BASE32[(value >> shift) & 31] for shift in range(125, -1, -5))
+            for value in values]
+
+# Column order of the projects and content records; their SELECT lists are built from these
+_PROJECT_FIELDS = ('id', 'name', 'type', 'created_at', 'updated_at', 'settings', 'status')
+_CONTENT_FIELDS = ('id', 'project_id', 'type', 'content_text', 'image_path', 'audio_path',
+                   'order_index', 'metadata', 'created_at')
+
+class _Record(Mapping):
+    """Read-only dict view of a row; the JSON column is decoded on first access.
+    
+    Rows index like the dicts getters used to return (``row['name']``,
+    ``row.get('metadata')``, ``dict(row)``), and ``to_dict`` gives a plain
+    dict for ``jsonify``. Records are deliberately not dicts: orjson reads
+    dict storage directly and would emit the undecoded column, so passing a
+    record to it raises TypeError instead.
+    """
+    __slots__ = ('_values', '_pending')
+    _JSON_FIELD: ClassVar[str] = ''
+    
+    def __init__(self, values: Dict[str, Any]):
+        self._values = values
+        self._pending = self._JSON_FIELD in values
+    
+    def __getitem__(self, key: str) -> Any:
+        if self._pending and key == self._JSON_FIELD:
+            raw = self._values[key]
+            # Empty columns are stored as NULL and come back as {} without a parse
+            self._values[key] = _loads(raw) if raw else {}
+            self._pending = False
+        return self._values[key]
+    
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+    
+    def __len__(self) -> int:
+        return len(self._values)
+    
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+    
+    def __copy__(self) -> '_Record':
+        # The copy gets its own storage; sharing it would let either side's
+        # decode leave the other thinking the column is still raw
+        clone = object.__new__(type(self))
+        clone._values = dict(self._values)
+        clone._pending = self._pending
+        return clone
+    
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()!r})"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: self[key] for key in self._values}
+
+class Content(_Record):
+    """A content row; ``metadata`` is decoded on first access."""
+    __slots__ = ()
+    _JSON_FIELD = 'metadata'
+
+class Project(_Record):
+    """A projects row; ``settings`` is decoded on first access.
+    
+    ``content`` is only present on rows from ``get_project_with_content``.
+    """
+    __slots__ = ()
+    _JSON_FIELD = 'settings'
+    
+    def to_dict(self) -> Dict[str, Any]:
+        project = super().to_dict()
+        if 'content' in project:
+            project['content'] = [item.to_dict() for item in project['content']]
+        return project
+
+# Both constructors take columns in _PROJECT_FIELDS/_CONTENT_FIELDS order
+def _row_to_project(row: sqlite3.Row, content: Optional[List[Content]] = None) -> Project:
+    """Shape a projects row for callers; settings stay undecoded until read."""
+    values = dict(zip(_PROJECT_FIELDS, row))
+    if content is not None:
+        values['content'] = content
+    return Project(values)
+
+def _row_to_content(row: sqlite3.Row) -> Content:
+    """Shape a content row for callers; metadata stays undecoded until read."""
+    return Content(dict(zip(_CONTENT_FIELDS, row)))
+
+def _row_to_template(row: sqlite3.Row) -> Dict[str, Any]:
+    """Shape a templates row for callers."""
+    template = dict(row)
+    template['is_default'] = bool(row['is_default'])
+    return template
+
+# Built-in LaTeX templates. The bodies live here rather than in SQLite, so
+# rendering never reads multi-KB TEXT columns; the table holds their metadata
+TEMPLATES: Dict[str, Dict[str, str]] = {
+    'children_storybook': {
+        'name': 'Children\'s Storybook',
+        'type': 'story',
+        'description': 'Colorful and engaging template for children\'s stories',
+        'template': '''\\documentclass[a4paper,12pt]{book}
 \\usepackage[utf8]{inputenc}
 \\usepackage{graphicx}
 \\usepackage[margin=1in]{geometry}
@@ -112,13 +195,12 @@ class DatabaseManager:
 {content}
 
 \\end{{document}}'''
-            },
-            {
-                'id': 'comic_book',
-                'name': 'Comic Book Style',
-                'type': 'comic',
-                'description': 'Dynamic layout perfect for comic-style stories',
-                'template': '''\\documentclass[a4paper]{article}
+    },
+    'comic_book': {
+        'name': 'Comic Book Style',
+        'type': 'comic',
+        'description': 'Dynamic layout perfect for comic-style stories',
+        'template': '''\\documentclass[a4paper]{article}
 \\usepackage[utf8]{inputenc}
 \\usepackage{graphicx}
 \\usepackage[margin=0.75in]{geometry}
@@ -141,13 +223,12 @@ class DatabaseManager:
 {content}
 
 \\end{{document}}'''
-            },
-            {
-                'id': 'educational_book',
-                'name': 'Educational Book',
-                'type': 'educational',
-                'description': 'Clean and professional template for educational content',
-                'template': '''\\documentclass[a4paper,11pt]{report}
+    },
+    'educational_book': {
+        'name': 'Educational Book',
+        'type': 'educational',
+        'description': 'Clean and professional template for educational content',
+        'template': '''\\documentclass[a4paper,11pt]{report}
 \\usepackage[utf8]{inputenc}
 \\usepackage{graphicx}
 \\usepackage[margin=1.2in]{geometry}
@@ -174,140 +255,470 @@ class DatabaseManager:
 {content}
 
 \\end{{document}}'''
-            }
-        ]
+    }
+}
+
+# Bump when init_database's schema changes and add the step to _migrate
+SCHEMA_VERSION = 1
+
+# INSERT ... RETURNING needs SQLite 3.35+
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35)
+
+# SELECT lists for the record constructors, so queries cannot drift from them
+_PROJECT_COLUMNS = ', '.join(_PROJECT_FIELDS)
+_CONTENT_COLUMNS = ', '.join(_CONTENT_FIELDS)
+_PROJECT_WITH_CONTENT_COLUMNS = ', '.join(
+    [f'p.{column}' for column in _PROJECT_FIELDS] + [f'c.{column}' for column in _CONTENT_FIELDS]
+)
+
+# Columns update_project/update_content accept, in the order they appear in SQL
+_PROJECT_UPDATE_FIELDS = ('name', 'type', 'status', 'settings')
+_CONTENT_UPDATE_FIELDS = ('content_text', 'image_path', 'audio_path', 'order_index', 'metadata')
+
+def _build_update_sql(table: str, fields: tuple, suffix: str = '') -> Dict[frozenset, tuple]:
+    """Prebuild one UPDATE statement per non-empty subset of fields.
+    
+    Maps frozenset(subset) -> (sql, ordered columns), so every call reuses
+    the same SQL text and SQLite never re-parses an update.
+    """
+    statements = {}
+    for r in range(1, len(fields) + 1):
+        for combo in itertools.combinations(fields, r):
+            assignments = ', '.join(f'{key} = ?' for key in combo)
+            statements[frozenset(combo)] = (
+                f"UPDATE {table} SET {assignments}{suffix} WHERE id = ?", combo
+            )
+    return statements
+
+_UPDATE_PROJECT_SQL = _build_update_sql('projects', _PROJECT_UPDATE_FIELDS,
+                                        ', updated_at = CURRENT_TIMESTAMP')
+_UPDATE_CONTENT_SQL = _build_update_sql('content', _CONTENT_UPDATE_FIELDS)
+
+class _ConnectionPool:
+    """One serialized writer connection plus a pool of read-only connections.
+    
+    Connections stay open so SQLite's page cache stays warm between calls;
+    under WAL the readers run concurrently with each other and the writer.
+    Writes submitted with ``submit`` run on a background thread that commits
+    whatever has queued up, up to ``batch_size`` tasks, as one transaction.
+    """
+    
+    def __init__(self, db_path: str, n_readers: int = 4, batch_size: int = 64):
+        self._writer = self._connect(db_path)
+        self._write_lock = threading.Lock()
+        self._readers = queue.Queue()
+        for _ in range(n_readers):
+            reader = self._connect(db_path)
+            reader.execute('PRAGMA query_only=ON')
+            self._readers.put(reader)
+        
+        self._batch_size = batch_size
+        self._write_queue: queue.Queue = queue.Queue()
+        self._writer_thread = threading.Thread(target=self._writer_loop, name='db-writer', daemon=True)
+        self._writer_thread.start()
+    
+    @staticmethod
+    def _connect(db_path: str) -> sqlite3.Connection:
+        """Open a connection with the shared tuning applied."""
+        # Queries are fixed strings, so a large statement cache lets SQLite
+        # skip re-parsing and re-planning them
+        conn = sqlite3.connect(db_path, check_same_thread=False, cached_statements=512)
+        conn.row_factory = sqlite3.Row
+        conn.executescript('''
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            PRAGMA temp_store=MEMORY;
+            PRAGMA cache_size=-64000;
+            PRAGMA mmap_size=268435456;
+        ''')
+        return conn
+    
+    @contextlib.contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Hold the writer connection exclusively."""
+        with self._write_lock:
+            yield self._writer
+    
+    def submit(self, task: Callable[[sqlite3.Connection], Any]) -> Future:
+        """Queue ``task(conn)`` for the writer thread.
+        
+        Tasks run inside a transaction the thread owns, so they only execute
+        statements and must not commit. The future resolves once the batch
+        holding the task has committed.
+        """
+        future = Future()
+        self._write_queue.put((task, future))
+        return future
+    
+    def _writer_loop(self) -> None:
+        """Drain the write queue, committing each batch of tasks together."""
+        while True:
+            item = self._write_queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self._batch_size:
+                try:
+                    item = self._write_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._run_batch(batch)
+                    return
+                batch.append(item)
+            self._run_batch(batch)
+    
+    def _run_batch(self, batch: List[tuple]) -> None:
+        """Run queued tasks in one transaction, isolating each in a savepoint."""
+        outcomes = []
+        with self._write_lock:
+            conn = self._writer
+            try:
+                conn.execute('BEGIN')
+                for task, future in batch:
+                    # A failing task only rolls back its own statements
+                    conn.execute('SAVEPOINT task')
+                    try:
+                        result = task(conn)
+                    except Exception as exc:
+                        conn.execute('ROLLBACK TO task')
+                        conn.execute('RELEASE task')
+                        outcomes.append((future, None, exc))
+                    else:
+                        conn.execute('RELEASE task')
+                        outcomes.append((future, result, None))
+                conn.commit()
+            except Exception as exc:
+                # The commit itself failed, so none of the batch was written
+                if conn.in_transaction:
+                    conn.rollback()
+                outcomes = [(future, None, exc) for _, future in batch]
+        
+        for future, result, exc in outcomes:
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+    
+    @contextlib.contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection, waiting if all are in use."""
+        conn = self._readers.get()
+        try:
+            yield conn
+        finally:
+            self._readers.put(conn)
+    
+    def close(self) -> None:
+        """Finish queued writes, then close every pooled connection."""
+        if self._writer_thread.is_alive():
+            self._write_queue.put(None)
+            self._writer_thread.join()
+        with self._write_lock:
+            self._writer.close()
+        while not self._readers.empty():
+            self._readers.get_nowait().close()
+
+class DatabaseManager:
+    """Handles all database operations for the StoryWeaver AI application."""
+    
+    def __init__(self, db_path: str = 'storyweaver.db'):
+        self.db_path = db_path
+        self._pool = _ConnectionPool(db_path)
+        atexit.register(self._pool.close)
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Templates only change when they are reseeded, so reads are served
+        # from memory and the caches are dropped by template writers
+        self._template_cache: Dict[str, Dict[str, Any]] = {}
+        self._templates_cache: Dict[Optional[str], List[Dict[str, Any]]] = {}
         
-        for template in templates:
+        self.init_database()
+    
+    def init_database(self) -> None:
+        """Initialize the database with required tables.
+        
+        The schema is only (re)built when ``PRAGMA user_version`` is behind
+        ``SCHEMA_VERSION`` and templates are only seeded into an empty table,
+        so opening an up-to-date database is two cheap reads.
+        """
+        with self._pool.writer() as conn:
+            version = conn.execute('PRAGMA user_version').fetchone()[0]
+            if version < SCHEMA_VERSION:
+                self._migrate(conn, version)
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+                conn.commit()
+            
+            seeded = conn.execute('SELECT 1 FROM templates LIMIT 1').fetchone()
+        
+        if not seeded:
+            self.insert_default_templates()
+    
+    def _migrate(self, conn: sqlite3.Connection, from_version: int) -> None:
+        """Bring the schema from ``from_version`` up to ``SCHEMA_VERSION``."""
+        # Version 1 is the initial schema; every statement is idempotent, so
+        # databases created before versioning upgrade in place
+        if from_version < 1:
+            cursor = conn.cursor()
+            
+            # Projects table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS projects (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    settings TEXT,
+                    status TEXT DEFAULT 'active'
+                )
+            ''')
+            
+            # Content table for storing story scenes, images, audio
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS content (
+                    id TEXT PRIMARY KEY,
+                    project_id TEXT,
+                    type TEXT NOT NULL,
+                    content_text TEXT,
+                    image_path TEXT,
+                    audio_path TEXT,
+                    order_index INTEGER DEFAULT 0,
+                    metadata TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE
+                )
+            ''')
+            
+            # Templates table for LaTeX templates
             cursor.execute('''
-                INSERT OR REPLACE INTO templates (id, name, type, latex_template, description, is_default)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (
-                template['id'], 
-                template['name'], 
-                template['type'], 
-                template['template'], 
-                template['description'], 
-                True
-            ))
-        
-        conn.commit()
-        conn.close()
-    
-    def create_project(self, name: str, project_type: str, settings: Optional[Dict] = None) -> str:
-        """Create a new project and return its ID."""
-        project_id = str(uuid.uuid4())
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+                CREATE TABLE IF NOT EXISTS templates (
+                    id TEXT PRIMARY KEY,
+                    name TEXT NOT NULL,
+                    type TEXT NOT NULL,
+                    latex_template TEXT NOT NULL,
+                    description TEXT,
+                    is_default BOOLEAN DEFAULT FALSE,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # User sessions table (for future multi-user support)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_sessions (
+                    id TEXT PRIMARY KEY,
+                    session_data TEXT DEFAULT '{}',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            
+            # Indexes matching the filter and sort order of each query, so
+            # lookups are range scans instead of full scans plus a sort
+            cursor.executescript('''
+                CREATE INDEX IF NOT EXISTS ix_projects_status_type_updated ON projects(status, type, updated_at DESC);
+                CREATE INDEX IF NOT EXISTS ix_content_project_order ON content(project_id, order_index, created_at);
+                CREATE INDEX IF NOT EXISTS ix_templates_type_default_name ON templates(type, is_default DESC, name);
+                CREATE INDEX IF NOT EXISTS ix_sessions_last_accessed ON user_sessions(last_accessed);
+                CREATE INDEX IF NOT EXISTS ix_content_type ON content(type);
+                ANALYZE;
+            ''')
+    
+    def insert_default_templates(self) -> None:
+        """Insert default LaTeX templates.
+        
+        Only their metadata is stored; ``get_template`` fills in the body from
+        ``TEMPLATES``.
+        """
+        # All templates go in as one statement inside one transaction, and
+        # the call waits so the caches are dropped only after the commit
+        self._executemany('''
+            INSERT OR REPLACE INTO templates (id, name, type, latex_template, description, is_default)
+            VALUES (?, ?, ?, '', ?, ?)
+        ''', [
+            (template_id, template['name'], template['type'], template['description'], True)
+            for template_id, template in TEMPLATES.items()
+        ])
+        
+        self._invalidate_template_cache()
+    
+    def _defer(self, task: Callable[[sqlite3.Connection], Any], wait: bool = True) -> Future:
+        """Run a write on the writer thread.
+        
+        By default the call blocks until the write has committed and raises
+        its error. With ``wait=False`` it returns once the write is queued,
+        for bulk or background writers that do not need the outcome; those
+        failures are only logged.
+        """
+        future = self._pool.submit(task)
+        if wait:
+            future.result()
+        else:
+            future.add_done_callback(self._log_write_failure)
+        return future
+    
+    @staticmethod
+    def _log_write_failure(future: Future) -> None:
+        """Log a write nobody waited on that failed."""
+        error = future.exception()
+        if error is not None:
+            logger.error("Queued database write failed", exc_info=error)
+    
+    def _execute(self, sql: str, params: tuple = (), wait: bool = True) -> Future:
+        """Run one statement on the writer; see ``_defer`` for ``wait``."""
+        return self._defer(lambda conn: conn.execute(sql, params), wait)
+    
+    def _executemany(self, sql: str, seq_of_params: List[tuple], wait: bool = True) -> Future:
+        """Run one statement over many parameter rows; see ``_defer`` for ``wait``."""
+        return self._defer(lambda conn: conn.executemany(sql, seq_of_params), wait)
+    
+    def flush(self) -> None:
+        """Wait until every queued write has committed.
+        
+        Only needed after ``wait=False`` writes, before reading back the rows
+        they wrote.
+        """
+        self._pool.submit(lambda conn: None).result()
+    
+    def _invalidate_template_cache(self) -> None:
+        """Drop cached templates after the templates table changes."""
+        self._template_cache.clear()
+        self._templates_cache.clear()
+    
+    def create_project(self, name: str, project_type: str, settings: Optional[Dict] = None,
+                       wait: bool = True) -> str:
+        """Create a new project and return its ID.
+        
+        The ID is generated up front, so with ``wait=False`` it is returned
+        while the INSERT is still queued.
+        """
+        project_id = _new_ulids(1)[0]
+        self._execute('''
             INSERT INTO projects (id, name, type, settings)
             VALUES (?, ?, ?, ?)
-        ''', (project_id, name, project_type, json.dumps(settings or {})))
-        
-        conn.commit()
-        conn.close()
+        ''', (project_id, name, project_type, _to_json(settings)), wait)
         
         return project_id
     
-    def get_projects(self, project_type: Optional[str] = None) -> List[Dict[str, Any]]:
+    def insert_project(self, name: str, project_type: str, settings: Optional[Dict] = None) -> Project:
+        """Create a new project and return the stored row.
+        
+        On SQLite 3.35+ the row comes back from ``INSERT ... RETURNING`` in
+        the same statement; older libraries read it back on the writer.
+        """
+        project_id = _new_ulids(1)[0]
+        params = (project_id, name, project_type, _to_json(settings))
+        
+        def insert(conn: sqlite3.Connection) -> sqlite3.Row:
+            if _HAS_RETURNING:
+                return conn.execute(f'''
+                    INSERT INTO projects (id, name, type, settings)
+                    VALUES (?, ?, ?, ?)
+                    RETURNING {_PROJECT_COLUMNS}
+                ''', params).fetchone()
+            conn.execute('''
+                INSERT INTO projects (id, name, type, settings)
+                VALUES (?, ?, ?, ?)
+            ''', params)
+            return conn.execute(f'SELECT {_PROJECT_COLUMNS} FROM projects WHERE id = ?',
+                                (project_id,)).fetchone()
+        
+        # The caller wants the stored row, so this write waits for its commit
+        return _row_to_project(self._pool.submit(insert).result())
+    
+    def get_projects(self, project_type: Optional[str] = None) -> List[Project]:
         """Get all projects, optionally filtered by type."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if project_type:
-            cursor.execute('''
-                SELECT * FROM projects 
-                WHERE type = ? AND status = 'active' 
-                ORDER BY updated_at DESC
-            ''', (project_type,))
-        else:
-            cursor.execute('''
-                SELECT * FROM projects 
-                WHERE status = 'active' 
-                ORDER BY updated_at DESC
-            ''')
-        
-        projects = cursor.fetchall()
-        conn.close()
-        
-        return [
-            {
-                'id': p[0],
-                'name': p[1],
-                'type': p[2],
-                'created_at': p[3],
-                'updated_at': p[4],
-                'settings': json.loads(p[5]) if p[5] else {},
-                'status': p[6]
-            }
-            for p in projects
-        ]
+        with self._pool.reader() as conn:
+            cursor = conn.cursor()
+            
+            if project_type:
+                cursor.execute(f'''
+                    SELECT {_PROJECT_COLUMNS}
+                    FROM projects 
+                    WHERE type = ? AND status = 'active' 
+                    ORDER BY updated_at DESC
+                ''', (project_type,))
+            else:
+                cursor.execute(f'''
+                    SELECT {_PROJECT_COLUMNS}
+                    FROM projects 
+                    WHERE status = 'active' 
+                    ORDER BY updated_at DESC
+                ''')
+            
+            return [_row_to_project(p) for p in cursor.fetchall()]
     
-    def get_project(self, project_id: str) -> Optional[Dict[str, Any]]:
+    def get_project(self, project_id: str) -> Optional[Project]:
         """Get a specific project by ID."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM projects WHERE id = ?', (project_id,))
-        project = cursor.fetchone()
-        conn.close()
-        
-        if project:
-            return {
-                'id': project[0],
-                'name': project[1],
-                'type': project[2],
-                'created_at': project[3],
-                'updated_at': project[4],
-                'settings': json.loads(project[5]) if project[5] else {},
-                'status': project[6]
-            }
-        return None
-    
-    def update_project(self, project_id: str, **kwargs) -> bool:
-        """Update project fields."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Build dynamic update query
-        fields = []
-        values = []
-        
-        for key, value in kwargs.items():
-            if key in ['name', 'type', 'status']:
-                fields.append(f'{key} = ?')
-                values.append(value)
-            elif key == 'settings':
-                fields.append('settings = ?')
-                values.append(json.dumps(value))
-        
-        if fields:
-            fields.append('updated_at = CURRENT_TIMESTAMP')
-            query = f"UPDATE projects SET {', '.join(fields)} WHERE id = ?"
+        with self._pool.reader() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute(f'''
+                SELECT {_PROJECT_COLUMNS}
+                FROM projects WHERE id = ?
+            ''', (project_id,))
+            project = cursor.fetchone()
+            
+            if project:
+                return _row_to_project(project)
+            return None
+    
+    def get_projects_lite(self, project_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the fields a project listing needs, without settings."""
+        with self._pool.reader() as conn:
+            if project_type:
+                cursor = conn.execute('''
+                    SELECT id, name, type, updated_at FROM projects 
+                    WHERE type = ? AND status = 'active' 
+                    ORDER BY updated_at DESC
+                ''', (project_type,))
+            else:
+                cursor = conn.execute('''
+                    SELECT id, name, type, updated_at FROM projects 
+                    WHERE status = 'active' 
+                    ORDER BY updated_at DESC
+                ''')
+            
+            return [dict(p) for p in cursor.fetchall()]
+    
+    def get_project_settings(self, project_id: str) -> Optional[Dict[str, Any]]:
+        """Get only a project's decoded settings."""
+        with self._pool.reader() as conn:
+            row = conn.execute('SELECT settings FROM projects WHERE id = ?', (project_id,)).fetchone()
+        
+        if row is None:
+            return None
+        return _loads(row['settings']) if row['settings'] else {}
+    
+    def update_project(self, project_id: str, wait: bool = True, **kwargs) -> bool:
+        """Update project fields.
+        
+        Waits for the commit unless ``wait=False``, in which case True only
+        means the update was queued.
+        """
+        # Look up the prebuilt statement for exactly these fields;
+        # unknown keys are ignored as before
+        key = frozenset(kwargs).intersection(_PROJECT_UPDATE_FIELDS)
+        if key:
+            query, columns = _UPDATE_PROJECT_SQL[key]
+            values = [_to_json(kwargs[col]) if col == 'settings' else kwargs[col]
+                      for col in columns]
             values.append(project_id)
             
-            cursor.execute(query, values)
-            conn.commit()
+            self._execute(query, tuple(values), wait)
         
-        conn.close()
         return True
     
-    def delete_project(self, project_id: str) -> bool:
-        """Soft delete a project by setting status to 'deleted'."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def delete_project(self, project_id: str, wait: bool = True) -> bool:
+        """Soft delete a project by setting status to 'deleted'.
         
-        cursor.execute('''
+        Waits for the commit unless ``wait=False``, in which case True only
+        means the delete was queued.
+        """
+        self._execute('''
             UPDATE projects 
             SET status = 'deleted', updated_at = CURRENT_TIMESTAMP 
             WHERE id = ?
-        ''', (project_id,))
-        
-        conn.commit()
-        conn.close()
+        ''', (project_id,), wait)
         return True
     
     def add_content(self, project_id: str, content_type: str, 
@@ -315,189 +726,228 @@ class DatabaseManager:
                    image_path: Optional[str] = None, 
                    audio_path: Optional[str] = None, 
                    order_index: int = 0,
-                   metadata: Optional[Dict] = None) -> str:
-        """Add content to a project."""
-        content_id = str(uuid.uuid4())
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+                   metadata: Optional[Dict] = None,
+                   wait: bool = True) -> str:
+        """Add content to a project.
+        
+        See ``add_content_bulk`` for ``wait``.
+        """
+        return self.add_content_bulk(project_id, [{
+            'content_type': content_type, 'text': text,
+            'image_path': image_path, 'audio_path': audio_path,
+            'order_index': order_index, 'metadata': metadata,
+        }], wait)[0]
+    
+    def add_content_bulk(self, project_id: str, rows: List[Dict[str, Any]],
+                         wait: bool = True) -> List[str]:
+        """Add several content items to a project in a single transaction.
+        
+        Each row takes the same keys as ``add_content``'s keyword arguments;
+        the generated content IDs are returned in row order. Prefer this over
+        repeated ``add_content`` calls when storing a generated story's scenes:
+        the whole set costs one statement and one commit.
+        
+        Waits for the commit unless ``wait=False``, in which case the IDs come
+        back while the insert is still queued.
+        """
+        content_ids = _new_ulids(len(rows))
+        params = [
+            (
+                content_id, project_id, row['content_type'], row.get('text'),
+                row.get('image_path'), row.get('audio_path'), row.get('order_index', 0),
+                _to_json(row.get('metadata'))
+            )
+            for content_id, row in zip(content_ids, rows)
+        ]
         
-        cursor.execute('''
+        self._executemany('''
             INSERT INTO content (id, project_id, type, content_text, image_path, audio_path, order_index, metadata)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            content_id, project_id, content_type, text, 
-            image_path, audio_path, order_index, 
-            json.dumps(metadata or {})
-        ))
-        
-        conn.commit()
-        conn.close()
+        ''', params, wait)
         
-        return content_id
+        return content_ids
+    
+    def iter_project_content(self, project_id: str, chunk_size: int = 256) -> Iterator[Content]:
+        """Yield a project's content in order without materializing it.
+        
+        Rows are read ``chunk_size`` at a time, each chunk a keyset query on
+        the (project_id, order_index, created_at) index, and the reader
+        connection goes back to the pool before any row is yielded. A caller
+        that stops early, or never closes the generator, holds no connection.
+        """
+        query = f'''
+            SELECT {_CONTENT_COLUMNS}
+            FROM content 
+            WHERE project_id = ? AND (order_index, created_at, id) > (?, ?, ?)
+            ORDER BY order_index, created_at, id
+            LIMIT ?
+        '''
+        # Sorts before every real key, so the first chunk starts at the top
+        last_key = (-2**63, '', '')
+        while True:
+            with self._pool.reader() as conn:
+                rows = conn.execute(query, (project_id, *last_key, chunk_size)).fetchall()
+            
+            for row in rows:
+                yield _row_to_content(row)
+            if len(rows) < chunk_size:
+                return
+            last_key = (rows[-1]['order_index'], rows[-1]['created_at'], rows[-1]['id'])
     
-    def get_project_content(self, project_id: str) -> List[Dict[str, Any]]:
+    def get_project_with_content(self, project_id: str) -> Optional[Project]:
+        """Get a project with its ordered content under ``'content'``.
+        
+        One LEFT JOIN replaces the get_project + get_project_content pair;
+        a project without content comes back with an empty list.
+        """
+        with self._pool.reader() as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = 256
+            
+            cursor.execute(f'''
+                SELECT {_PROJECT_WITH_CONTENT_COLUMNS}
+                FROM projects p
+                LEFT JOIN content c ON c.project_id = p.id
+                WHERE p.id = ?
+                ORDER BY c.order_index, c.created_at
+            ''', (project_id,))
+            rows = cursor.fetchall()
+        
+        if not rows:
+            return None
+        
+        # Rows are positional: the joined columns share names with the
+        # project's, so sqlite3.Row keys would be ambiguous
+        split = len(_PROJECT_FIELDS)
+        return _row_to_project(rows[0][:split], [
+            _row_to_content(row[split:])
+            for row in rows if row[split] is not None
+        ])
+    
+    def get_project_content(self, project_id: str) -> List[Content]:
         """Get all content for a project."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT * FROM content 
-            WHERE project_id = ? 
-            ORDER BY order_index, created_at
-        ''', (project_id,))
-        
-        content = cursor.fetchall()
-        conn.close()
-        
-        return [
-            {
-                'id': c[0],
-                'project_id': c[1],
-                'type': c[2],
-                'content_text': c[3],
-                'image_path': c[4],
-                'audio_path': c[5],
-                'order_index': c[6],
-                'metadata': json.loads(c[7]) if c[7] else {},
-                'created_at': c[8]
-            }
-            for c in content
-        ]
+        return list(self.iter_project_content(project_id))
     
-    def update_content(self, content_id: str, **kwargs) -> bool:
-        """Update content fields."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        fields = []
-        values = []
-        
-        for key, value in kwargs.items():
-            if key in ['content_text', 'image_path', 'audio_path', 'order_index']:
-                fields.append(f'{key} = ?')
-                values.append(value)
-            elif key == 'metadata':
-                fields.append('metadata = ?')
-                values.append(json.dumps(value))
-        
-        if fields:
-            query = f"UPDATE content SET {', '.join(fields)} WHERE id = ?"
+    def update_content(self, content_id: str, wait: bool = True, **kwargs) -> bool:
+        """Update content fields.
+        
+        Waits for the commit unless ``wait=False``, in which case True only
+        means the update was queued.
+        """
+        key = frozenset(kwargs).intersection(_CONTENT_UPDATE_FIELDS)
+        if key:
+            query, columns = _UPDATE_CONTENT_SQL[key]
+            values = [_to_json(kwargs[col]) if col == 'metadata' else kwargs[col]
+                      for col in columns]
             values.append(content_id)
             
-            cursor.execute(query, values)
-            conn.commit()
+            self._execute(query, tuple(values), wait)
         
-        conn.close()
         return True
     
-    def delete_content(self, content_id: str) -> bool:
-        """Delete content by ID."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def delete_content(self, content_id: str, wait: bool = True) -> bool:
+        """Delete content by ID.
         
-        cursor.execute('DELETE FROM content WHERE id = ?', (content_id,))
-        conn.commit()
-        conn.close()
+        Waits for the commit unless ``wait=False``, in which case True only
+        means the delete was queued.
+        """
+        self._execute('DELETE FROM content WHERE id = ?', (content_id,), wait)
         return True
     
     def get_templates(self, template_type: Optional[str] = None) -> List[Dict[str, Any]]:
         """Get available templates."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        if template_type:
-            cursor.execute('''
-                SELECT id, name, type, description, is_default, created_at 
-                FROM templates WHERE type = ? 
-                ORDER BY is_default DESC, name
-            ''', (template_type,))
-        else:
-            cursor.execute('''
-                SELECT id, name, type, description, is_default, created_at 
-                FROM templates 
-                ORDER BY type, is_default DESC, name
-            ''')
-        
-        templates = cursor.fetchall()
-        conn.close()
-        
-        return [
-            {
-                'id': t[0],
-                'name': t[1],
-                'type': t[2],
-                'description': t[3],
-                'is_default': bool(t[4]),
-                'created_at': t[5]
-            }
-            for t in templates
-        ]
+        templates = self._templates_cache.get(template_type)
+        if templates is None:
+            templates = self._templates_cache[template_type] = self._query_templates(template_type)
+        # Copies, so callers can't mutate the cached entries
+        return [dict(t) for t in templates]
+    
+    def _query_templates(self, template_type: Optional[str]) -> List[Dict[str, Any]]:
+        """Read the template listing from the database."""
+        with self._pool.reader() as conn:
+            cursor = conn.cursor()
+            
+            if template_type:
+                cursor.execute('''
+                    SELECT id, name, type, description, is_default, created_at 
+                    FROM templates WHERE type = ? 
+                    ORDER BY is_default DESC, name
+                ''', (template_type,))
+            else:
+                cursor.execute('''
+                    SELECT id, name, type, description, is_default, created_at 
+                    FROM templates 
+                    ORDER BY type, is_default DESC, name
+                ''')
+            
+            return [_row_to_template(t) for t in cursor.fetchall()]
     
     def get_template(self, template_id: str) -> Optional[Dict[str, Any]]:
         """Get a specific template by ID."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT * FROM templates WHERE id = ?', (template_id,))
-        template = cursor.fetchone()
-        conn.close()
-        
-        if template:
-            return {
-                'id': template[0],
-                'name': template[1],
-                'type': template[2],
-                'latex_template': template[3],
-                'description': template[4],
-                'is_default': bool(template[5]),
-                'created_at': template[6]
-            }
-        return None
-    
-    def cleanup_old_sessions(self, days: int = 30) -> None:
+        template = self._template_cache.get(template_id)
+        if template is None:
+            template = self._query_template(template_id)
+            if template is None:
+                return None
+            self._template_cache[template_id] = template
+        return dict(template)
+    
+    def _query_template(self, template_id: str) -> Optional[Dict[str, Any]]:
+        """Read one template from the database."""
+        builtin = TEMPLATES.get(template_id)
+        with self._pool.reader() as conn:
+            cursor = conn.cursor()
+            
+            if builtin:
+                # Built-in bodies come from TEMPLATES, so skip the TEXT column
+                cursor.execute('''
+                    SELECT id, name, type, description, is_default, created_at
+                    FROM templates WHERE id = ?
+                ''', (template_id,))
+            else:
+                cursor.execute('''
+                    SELECT id, name, type, latex_template, description, is_default, created_at
+                    FROM templates WHERE id = ?
+                ''', (template_id,))
+            template = cursor.fetchone()
+            
+            if not template:
+                return None
+            template = _row_to_template(template)
+            if builtin:
+                template['latex_template'] = builtin['template']
+            return template
+    
+    def cleanup_old_sessions(self, days: int = 30, wait: bool = True) -> None:
         """Clean up old user sessions."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
+        self._execute('''
             DELETE FROM user_sessions 
-            WHERE datetime(last_accessed) < datetime('now', '-' || ? || ' days')
-        ''', (days,))
-        
-        conn.commit()
-        conn.close()
+            WHERE last_accessed < datetime('now', '-' || ? || ' days')
+        ''', (days,), wait)
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get database statistics."""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Count projects by type
-        cursor.execute('''
-            SELECT type, COUNT(*) as count 
-            FROM projects 
-            WHERE status = 'active' 
-            GROUP BY type
-        ''')
-        projects_by_type = {row[0]: row[1] for row in cursor.fetchall()}
-        
-        # Count total content items
-        cursor.execute('SELECT COUNT(*) FROM content')
-        total_content = cursor.fetchone()[0]
-        
-        # Count content by type
-        cursor.execute('''
-            SELECT type, COUNT(*) as count 
-            FROM content 
-            GROUP BY type
-        ''')
-        content_by_type = {row[0]: row[1] for row in cursor.fetchall()}
+        with self._pool.reader() as conn:
+            # Both per-type counts in one round trip; each side is answered
+            # from its type index without touching the table rows
+            rows = conn.execute('''
+                SELECT 'projects' AS kind, type, COUNT(*) AS count 
+                FROM projects 
+                WHERE status = 'active' 
+                GROUP BY type
+                UNION ALL
+                SELECT 'content' AS kind, type, COUNT(*) AS count 
+                FROM content 
+                GROUP BY type
+            ''').fetchall()
         
-        conn.close()
+        projects_by_type = {row['type']: row['count'] for row in rows if row['kind'] == 'projects'}
+        content_by_type = {row['type']: row['count'] for row in rows if row['kind'] == 'content'}
         
         return {
             'projects_by_type': projects_by_type,
-            'total_content': total_content,
+            # Content type is NOT NULL, so the per-type counts cover every row
+            'total_content': sum(content_by_type.values()),
             'content_by_type': content_by_type,
             'total_projects': sum(projects_by_type.values())
         }
\ No newline at end of file
@@ -1,31 +1,315 @@
+import io
 import os
+import atexit
+import errno
+import re
 import subprocess
 import tempfile
-import shutil
+import hashlib
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from string import Template
 from datetime import datetime
-from typing import Optional, Dict, List, Tuple, Any
+from itertools import cycle, groupby
+from typing import Optional, Dict, List, Tuple, Any, Iterator
 from pathlib import Path
 
+# Single-character LaTeX escapes, applied in one str.translate pass
+_LATEX_TRANSLATE = str.maketrans({
+    '&': '\\&',
+    '%': '\\%',
+    '$': '\\$',
+    '#': '\\#',
+    '^': '\\textasciicircum{}',
+    '_': '\\_',
+    '{': '\\{',
+    '}': '\\}',
+    '~': '\\textasciitilde{}',
+    '\\': '\\textbackslash{}',
+    # Typographic quotes already say which side they are on
+    '\u201c': '``',
+    '\u201d': "''"
+})
+
+# Straight double quotes, paired up as opening/closing LaTeX quotes
+_QUOTE_RE = re.compile('"')
+
+# Any character _clean_text_for_latex would rewrite; most story text has none
+_LATEX_SPECIAL_RE = re.compile('[\\\\&%$#^_{}~"\u201c\u201d]')
+
+@functools.lru_cache(maxsize=4096)
+def _clean_text_for_latex(text: str) -> str:
+    """Clean text for LaTeX compilation.
+    
+    Titles, author names and captions repeat across the cover, TOC and body,
+    so results are cached by input.
+    """
+    
+    clean_text = text
+    
+    # Plain text, the common case, skips the escaping passes entirely
+    if _LATEX_SPECIAL_RE.search(text):
+        # Escape special LaTeX characters; translate maps every character of
+        # the original text at once, so inserted backslashes aren't re-escaped
+        clean_text = clean_text.translate(_LATEX_TRANSLATE)
+        
+        # Handle quotes: straight quotes alternate opening/closing, with
+        # fresh state per call
+        quotes = cycle(('``', "''"))
+        clean_text = _QUOTE_RE.sub(lambda _: next(quotes), clean_text)
+    
+    # Add paragraph breaks
+    paragraphs = clean_text.split('\n\n')
+    return '\n\n'.join(f"\\noindent {para.strip()}" for para in paragraphs if para.strip())
+
+# Preamble lines that only load the class, packages and colours, and so can be
+# dumped into a precompiled format
+_DUMPABLE_LINE_RE = re.compile(r'\\(?:documentclass|usepackage|RequirePackage|definecolor)\b')
+
+# Macros whose output depends on the previous pass's .aux/.toc/.out files;
+# without any of them a single pass produces the final PDF
+_NEEDS_RERUN_RE = re.compile(
+    r'\\(?:tableofcontents|ref|pageref|cite|listoffigures|listoftables|bibliography)\b'
+    r'|\{hyperref\}'
+)
+
+# Flags for every pass: batchmode keeps the console quiet (the log file still
+# has everything), errors stop the run at the first file:line message, and
+# documents never get to run shell commands
+_LATEX_RUN_ARGS = ('-interaction=batchmode', '-halt-on-error', '-no-shell-escape', '-file-line-error')
+
+# Where pdflatex can \input the source from a pipe, so compiles skip the .tex
+# write; elsewhere (e.g. Windows) the source goes to a temporary file
+_STDIN_SOURCE = '/dev/stdin' if os.path.exists('/dev/stdin') else None
+
+# Log lines of a run that was not allowed to open the piped source, e.g.
+# under a restrictive openin_any setting
+_STDIN_REFUSED_RE = re.compile(r"Not reading .*stdin|File `/dev/stdin' not found|can't find file `/dev/stdin'")
+
+# RAM-backed scratch space for pdflatex's .aux/.log/.toc round trips between
+# passes, when the platform has one; None falls back to the default temp dir
+_RAM_TMP = next((path for path in ('/dev/shm', '/Volumes/RAMDisk')
+                 if os.path.isdir(path) and os.access(path, os.W_OK)), None)
+
+# Static parts of the audiobook companion; only the title and tracks vary
+_AUDIOBOOK_PREAMBLE = Template('''\\documentclass[a5paper,12pt]{article}
+\\usepackage[utf8]{inputenc}
+\\usepackage{graphicx}
+\\usepackage[margin=1in]{geometry}
+\\usepackage{hyperref}
+\\usepackage{xcolor}
+
+\\title{Audio Companion: $title}
+\\author{StoryWeaver AI}
+\\date{\\today}
+
+\\begin{document}
+\\maketitle
+\\newpage
+
+\\section*{How to Use This Audiobook}
+This companion guide contains instructions for accessing the audio narration of your story.
+\\vspace{1em}
+
+\\section*{Audio Tracks}
+''')
+
+_AUDIOBOOK_EPILOGUE = '''
+
+\\end{document}'''
+
+class _PreambleFormats:
+    """Precompiled formats for the package-loading part of LaTeX preambles.
+    
+    Loading packages dominates the run time of a short document. The first
+    document with a given class/package block dumps that block into a format
+    file with ``mylatexformat``, and later compiles load the format instead of
+    re-reading every package. If a format cannot be built (for example because
+    mylatexformat is not installed), or a document fails to compile with it,
+    that preamble compiles the normal way from then on. A document that fails
+    both with and without its format is broken itself and leaves the format
+    in place.
+    
+    Formats live in a private per-process directory, so other users cannot
+    plant format files and other workers never see one half-written.
+    """
+    
+    def __init__(self, compiler: str):
+        self.compiler = compiler
+        self.cache_dir = tempfile.mkdtemp(prefix='storyweaver-latex-formats-')
+        atexit.register(self._remove_cache_dir)
+        # Trailing separator keeps kpathsea's default format search path
+        self.env = {**os.environ, 'TEXFORMATS': self.cache_dir + os.pathsep}
+        # Guards _failed and _build_locks; format builds hold only their own lock
+        self._lock = threading.Lock()
+        self._failed = set()
+        self._build_locks: Dict[str, threading.Lock] = {}
+        self._engine_version: Optional[str] = None
+    
+    def prepare(self, latex_code: str) -> Tuple[str, Optional[str]]:
+        """Return the code to compile and the format to load it with.
+        
+        When a format is available, ``\\endofdump`` is inserted after the
+        dumped block so the rest of the preamble (title, author, page style)
+        still runs per document. Otherwise the code comes back unchanged with
+        no format.
+        """
+        preamble, begin, _ = latex_code.partition('\\begin{document}')
+        if not begin:
+            return latex_code, None
+        
+        lines = preamble.split('\n')
+        last = max((i for i, line in enumerate(lines) if _DUMPABLE_LINE_RE.match(line)), default=-1)
+        if last < 0:
+            return latex_code, None
+        
+        prefix = '\n'.join(lines[:last + 1])
+        # Formats only load in the engine build that dumped them, so the
+        # version is part of the key
+        key = f"{self.compiler}\n{self._get_engine_version()}\n{prefix}"
+        name = 'storyweaver-' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        if not self._ensure_format(name, prefix):
+            return latex_code, None
+        return f"{prefix}\n\\endofdump{latex_code[len(prefix):]}", name
+    
+    def discard(self, name: str):
+        """Stop using a format that a document failed to compile with."""
+        with self._lock:
+            self._failed.add(name)
+            try:
+                os.remove(os.path.join(self.cache_dir, f"{name}.fmt"))
+            except OSError:
+                pass
+    
+    def _get_engine_version(self) -> str:
+        """Return the compiler's version banner, probed once."""
+        if self._engine_version is None:
+            try:
+                result = subprocess.run([self.compiler, '--version'],
+                                        capture_output=True, text=True, timeout=30)
+                self._engine_version = result.stdout.partition('\n')[0]
+            except (OSError, subprocess.TimeoutExpired):
+                self._engine_version = ''
+        return self._engine_version
+    
+    def _ensure_format(self, name: str, prefix: str) -> bool:
+        """Build ``name.fmt`` from ``prefix`` unless it exists or already failed."""
+        fmt_path = os.path.join(self.cache_dir, f"{name}.fmt")
+        # Formats only ever appear complete, so the common case needs no lock
+        if name in self._failed:
+            return False
+        if os.path.exists(fmt_path):
+            return True
+        
+        # Builds take up to two minutes; lock per format so compiles of other
+        # preambles are never queued behind one
+        with self._lock:
+            build_lock = self._build_locks.setdefault(name, threading.Lock())
+        
+        with build_lock:
+            # Another thread may have finished the build while this one waited
+            if name in self._failed:
+                return False
+            if os.path.exists(fmt_path):
+                return True
+            
+            # Dump under a scratch job name and move the finished format into
+            # place, so a format is either complete or absent
+            job = f"{name}.partial"
+            with open(os.path.join(self.cache_dir, f"{job}.tex"), 'w', encoding='utf-8') as f:
+                f.write(f"{prefix}\n\\endofdump\n\\begin{{document}}\n\\end{{document}}\n")
+            
+            try:
+                result = subprocess.run([
+                    self.compiler,
+                    '-ini',
+                    f'-jobname={job}',
+                    '-interaction=batchmode',
+                    '-no-shell-escape',
+                    f'&{self.compiler}',
+                    'mylatexformat.ltx',
+                    f'{job}.tex'
+                ], cwd=self.cache_dir, capture_output=True, text=True, timeout=120)
+                built = result.returncode == 0
+            except (OSError, subprocess.TimeoutExpired):
+                built = False
+            
+            try:
+                if built:
+                    os.replace(os.path.join(self.cache_dir, f"{job}.fmt"), fmt_path)
+            except OSError:
+                built = False
+            
+            if not built:
+                with self._lock:
+                    self._failed.add(name)
+                return False
+            return True
+    
+    def _remove_cache_dir(self):
+        """Delete the format directory when the process exits."""
+        import shutil
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
 class PDFGenerator:
     """Handles PDF generation from LaTeX code and content."""
     
+    # Environment-derived settings, read once per process by _init_class_config
+    # so constructing a generator per request costs no getenv/mkdir calls
+    _class_config_ready = False
+    _class_config_lock = threading.Lock()
+    
     def __init__(self, db_manager):
+        self._init_class_config()
         self.db_manager = db_manager
-        self.latex_compiler = os.getenv('LATEX_COMPILER', 'pdflatex')
-        self.output_dir = os.getenv('LATEX_OUTPUT_DIR', 'static/exports')
-        self.temp_dir = tempfile.gettempdir()
-        
-        # Ensure output directory exists
-        os.makedirs(self.output_dir, exist_ok=True)
+        self.latex_compiler = self._config_compiler
+        self.output_dir = self._config_output_dir
+        self.temp_dir = self._config_temp_dir
+        self.scratch_dir = self._config_scratch_dir
+        self._latex_available: Optional[bool] = None
+        self._formats = self._config_formats
+        
+        # Cover pages are pure functions of their inputs, so regenerating a
+        # project reuses the rendered LaTeX; per instance to keep self out of
+        # the key
+        self._render_cover = functools.lru_cache(maxsize=128)(self._render_cover_uncached)
     
-    def check_latex_installation(self) -> bool:
-        """Check if LaTeX is properly installed."""
-        try:
-            result = subprocess.run([self.latex_compiler, '--version'], 
-                                  capture_output=True, text=True)
-            return result.returncode == 0
-        except FileNotFoundError:
-            return False
+    @classmethod
+    def _init_class_config(cls):
+        """Read the LaTeX settings and create the output directory, once."""
+        if cls._class_config_ready:
+            return
+        with cls._class_config_lock:
+            if cls._class_config_ready:
+                return
+            cls._config_compiler = os.getenv('LATEX_COMPILER', 'pdflatex')
+            cls._config_output_dir = os.getenv('LATEX_OUTPUT_DIR', 'static/exports')
+            cls._config_temp_dir = tempfile.gettempdir()
+            cls._config_scratch_dir = os.getenv('LATEX_TMP_DIR') or _RAM_TMP
+            # Cleared after the first compile that could not read the pipe
+            cls._config_pipe_source = _STDIN_SOURCE is not None
+            # Shared so every generator reuses the same built formats
+            cls._config_formats = _PreambleFormats(cls._config_compiler)
+            
+            # Ensure output directory exists
+            os.makedirs(cls._config_output_dir, exist_ok=True)
+            cls._class_config_ready = True
+    
+    def check_latex_installation(self, refresh: bool = False) -> bool:
+        """Check if LaTeX is properly installed.
+        
+        The answer is cached for the life of the generator, since every
+        compile asks; pass ``refresh=True`` to probe the compiler again.
+        """
+        if self._latex_available is None or refresh:
+            try:
+                result = subprocess.run([self.latex_compiler, '--version'], 
+                                      capture_output=True, text=True)
+                self._latex_available = result.returncode == 0
+            except FileNotFoundError:
+                self._latex_available = False
+        return self._latex_available
     
     def generate_latex_from_project(self, 
                                    project_id: str, 
@@ -33,8 +317,8 @@ class PDFGenerator:
                                    custom_settings: Optional[Dict] = None) -> Tuple[Optional[str], Optional[str]]:
         """Generate LaTeX code from a project's content."""
         
-        # Get project information
-        project = self.db_manager.get_project(project_id)
+        # Get project information and content in one query
+        project = self.db_manager.get_project_with_content(project_id)
         if not project:
             return None, "Project not found"
         
@@ -43,18 +327,18 @@ class PDFGenerator:
         if not template:
             return None, "Template not found"
         
-        # Get project content
-        content_items = self.db_manager.get_project_content(project_id)
+        content_items = project['content']
         
         # Build LaTeX content sections
-        latex_sections = self._build_content_sections(content_items, custom_settings)
+        content_buffer = io.StringIO()
+        self._write_content_sections(content_buffer, content_items, custom_settings)
         
         # Prepare template variables
         template_vars = {
             'title': project['name'],
             'author': custom_settings.get('author', 'StoryWeaver AI'),
             'date': datetime.now().strftime("%B %d, %Y"),
-            'content': '\n\n'.join(latex_sections)
+            'content': content_buffer.getvalue()
         }
         
         # Fill template
@@ -66,108 +350,78 @@ class PDFGenerator:
         except Exception as e:
             return None, f"Template processing error: {str(e)}"
     
-    def _build_content_sections(self, 
-                               content_items: List[Dict],
-                               settings: Optional[Dict] = None) -> List[str]:
-        """Build LaTeX sections from content items."""
-        
-        sections = []
-        current_scene = 1
+    def _write_content_sections(self, 
+                                buf: io.StringIO,
+                                content_items: List[Dict],
+                                settings: Optional[Dict] = None) -> None:
+        """Write LaTeX sections for content items to ``buf``, blank-line separated."""
+        
+        def start_section() -> None:
+            if buf.tell():
+                buf.write('\n\n')
+        
+        # Probe each distinct image path once, not once per reference
+        image_paths = {
+            item['image_path']
+            for item in content_items
+            if item['type'] == 'image' and item['image_path']
+        }
+        image_exists = {path: os.path.exists(path) for path in image_paths}
         
         # Group content by scene/chapter
         grouped_content = self._group_content_by_scene(content_items)
         
         for scene_content in grouped_content:
-            scene_sections = []
-            
             # Add scene/chapter title
             if scene_content.get('title'):
+                start_section()
                 if settings and settings.get('book_type') == 'comic':
-                    scene_sections.append(f"\\section*{{{scene_content['title']}}}")
+                    buf.write(f"\\section*{{{scene_content['title']}}}")
                 else:
-                    scene_sections.append(f"\\chapter{{{scene_content['title']}}}")
+                    buf.write(f"\\chapter{{{scene_content['title']}}}")
             
             # Add text content
             for item in scene_content.get('text_items', []):
                 if item['content_text']:
                     # Clean and format text for LaTeX
-                    clean_text = self._clean_text_for_latex(item['content_text'])
-                    scene_sections.append(clean_text)
+                    start_section()
+                    buf.write(self._clean_text_for_latex(item['content_text']))
             
             # Add images
             for item in scene_content.get('image_items', []):
-                if item['image_path'] and os.path.exists(item['image_path']):
-                    image_section = self._create_image_section(item, settings)
-                    scene_sections.append(image_section)
+                if item['image_path'] and image_exists[item['image_path']]:
+                    start_section()
+                    self._write_image_section(buf, item, settings)
             
             # Add scene break
-            scene_sections.append("\\vspace{1em}")
-            
-            if scene_sections:
-                sections.extend(scene_sections)
-            
-            current_scene += 1
-        
-        return sections
+            start_section()
+            buf.write("\\vspace{1em}")
     
-    def _group_content_by_scene(self, content_items: List[Dict]) -> List[Dict]:
-        """Group content items by scene/order."""
-        
-        scenes = {}
-        
-        for item in content_items:
-            scene_index = item['order_index'] // 10  # Group by tens
-            
-            if scene_index not in scenes:
-                scenes[scene_index] = {
-                    'title': f"Scene {scene_index + 1}",
-                    'text_items': [],
-                    'image_items': [],
-                    'audio_items': []
-                }
+    def _group_content_by_scene(self, content_items: List[Dict]) -> Iterator[Dict]:
+        """Group content items by scene/order, yielding scenes in order."""
+        
+        # Stable sort: items sharing an order_index keep their stored order
+        items = sorted(content_items, key=lambda item: item['order_index'])
+        
+        for scene_index, scene_items in groupby(items, key=lambda item: item['order_index'] // 10):  # Group by tens
+            buckets = {'text': [], 'image': [], 'audio': []}
+            for item in scene_items:
+                bucket = buckets.get(item['type'])
+                if bucket is not None:
+                    bucket.append(item)
             
-            if item['type'] == 'text':
-                scenes[scene_index]['text_items'].append(item)
-            elif item['type'] == 'image':
-                scenes[scene_index]['image_items'].append(item)
-            elif item['type'] == 'audio':
-                scenes[scene_index]['audio_items'].append(item)
-        
-        # Convert to sorted list
-        return [scenes[key] for key in sorted(scenes.keys())]
-    
-    def _clean_text_for_latex(self, text: str) -> str:
-        """Clean text for LaTeX compilation."""
-        
-        # Escape special LaTeX characters
-        latex_special_chars = {
-            '&': '\\&',
-            '%': '\\%',
-            '$': '\\$',
-            '#': '\\#',
-            '^': '\\textasciicircum{}',
-            '_': '\\_',
-            '{': '\\{',
-            '}': '\\}',
-            '~': '\\textasciitilde{}',
-            '\\': '\\textbackslash{}'
-        }
-        
-        clean_text = text
-        for char, replacement in latex_special_chars.items():
-            clean_text = clean_text.replace(char, replacement)
-        
-        # Handle quotes
-        clean_text = clean_text.replace('"', "''")
-        clean_text = clean_text.replace('"', '``')
-        clean_text = clean_text.replace('"', "''")
-        
-        # Add paragraph breaks
-        paragraphs = clean_text.split('\n\n')
-        return '\n\n'.join(f"\\noindent {para.strip()}" for para in paragraphs if para.strip())
+            yield {
+                'title': f"Scene {scene_index + 1}",
+                'text_items': buckets['text'],
+                'image_items': buckets['image'],
+                'audio_items': buckets['audio']
+            }
+    
+    # Pure function of its input, memoized at module level
+    _clean_text_for_latex = staticmethod(_clean_text_for_latex)
     
-    def _create_image_section(self, image_item: Dict, settings: Optional[Dict] = None) -> str:
-        """Create LaTeX code for an image."""
+    def _write_image_section(self, buf: io.StringIO, image_item: Dict, settings: Optional[Dict] = None) -> None:
+        """Write LaTeX code for an image to ``buf``."""
         
         image_path = image_item['image_path']
         
@@ -179,29 +433,20 @@ class PDFGenerator:
         width = settings.get('image_width', '0.8') if settings else '0.8'
         centering = settings.get('center_images', True) if settings else True
         
-        image_latex = [
-            "\\begin{figure}[h!]",
-        ]
+        buf.write("\\begin{figure}[h!]\n")
         
         if centering:
-            image_latex.append("\\centering")
+            buf.write("\\centering\n")
         
-        image_latex.extend([
-            f"\\includegraphics[width={width}\\textwidth]{{{image_path}}}",
-        ])
+        buf.write(f"\\includegraphics[width={width}\\textwidth]{{{image_path}}}\n")
         
         # Add caption if available in metadata
         metadata = image_item.get('metadata', {})
         if metadata and metadata.get('caption'):
             caption = self._clean_text_for_latex(metadata['caption'])
-            image_latex.append(f"\\caption{{{caption}}}")
+            buf.write(f"\\caption{{{caption}}}\n")
         
-        image_latex.extend([
-            "\\end{figure}",
-            "\\vspace{0.5em}"
-        ])
-        
-        return '\n'.join(image_latex)
+        buf.write("\\end{figure}\n\\vspace{0.5em}")
     
     def compile_pdf(self, 
                    latex_code: str, 
@@ -212,50 +457,141 @@ class PDFGenerator:
         if not self.check_latex_installation():
             return None, "LaTeX is not installed or not accessible"
         
-        # Create temporary directory for compilation
-        with tempfile.TemporaryDirectory() as temp_dir:
-            try:
-                # Write LaTeX code to file
-                tex_file = os.path.join(temp_dir, 'document.tex')
-                with open(tex_file, 'w', encoding='utf-8') as f:
-                    f.write(latex_code)
-                
-                # First compilation
-                result1 = subprocess.run([
-                    self.latex_compiler,
-                    '-output-directory', temp_dir,
-                    '-interaction=nonstopmode',
-                    tex_file
-                ], capture_output=True, text=True, timeout=60)
-                
-                # Second compilation if requested (for TOC, references, etc.)
-                if compile_twice and result1.returncode == 0:
-                    result2 = subprocess.run([
-                        self.latex_compiler,
-                        '-output-directory', temp_dir,
-                        '-interaction=nonstopmode',
-                        tex_file
-                    ], capture_output=True, text=True, timeout=60)
-                    final_result = result2
-                else:
-                    final_result = result1
-                
-                pdf_file = os.path.join(temp_dir, 'document.pdf')
-                
-                if final_result.returncode == 0 and os.path.exists(pdf_file):
-                    # Copy PDF to output directory
-                    output_path = os.path.join(self.output_dir, f"{output_filename}.pdf")
+        # Only pay for a second pass when something reads cross-references
+        compile_twice = compile_twice and bool(_NEEDS_RERUN_RE.search(latex_code))
+        
+        # Load the preamble's packages from a precompiled format when possible
+        prepared_code, fmt = self._formats.prepare(latex_code)
+        output_path = os.path.join(self.output_dir, f"{output_filename}.pdf")
+        
+        try:
+            error_log = self._compile_attempt(prepared_code, fmt, compile_twice, output_path)
+            if error_log is not None and fmt:
+                # Retry from the full source. Only when that succeeds was the
+                # format at fault (dumped badly, or no longer matches the
+                # engine), so only then drop it; a document that is broken
+                # either way keeps the format and reports its first log
+                if self._compile_attempt(latex_code, None, compile_twice, output_path) is None:
+                    self._formats.discard(fmt)
+                    error_log = None
+        except subprocess.TimeoutExpired:
+            return None, "LaTeX compilation timeout"
+        except Exception as e:
+            return None, f"PDF generation error: {str(e)}"
+        
+        if error_log is not None:
+            return None, f"LaTeX compilation failed:\n{error_log}"
+        return output_path, None
+    
+    def _compile_attempt(self,
+                         latex_code: str,
+                         fmt: Optional[str],
+                         compile_twice: bool,
+                         output_path: str) -> Optional[str]:
+        """Compile once into ``output_path``; return None or the error log."""
+        fmt_args = [f'-fmt={fmt}'] if fmt else []
+        env = self._formats.env if fmt else None
+        
+        # Create temporary directory for compilation, in RAM where available
+        with tempfile.TemporaryDirectory(dir=self.scratch_dir) as temp_dir:
+            pipe = self._config_pipe_source
+            final_result = self._run_passes(latex_code, fmt_args, env, compile_twice, temp_dir, pipe)
+            if (pipe and final_result.returncode != 0
+                    and _STDIN_REFUSED_RE.search(self._read_log(temp_dir))):
+                # The TeX configuration refuses to read the pipe, so write the
+                # source to file for this and every later compile
+                type(self)._config_pipe_source = False
+                final_result = self._run_passes(latex_code, fmt_args, env, compile_twice, temp_dir, False)
+            
+            pdf_file = os.path.join(temp_dir, 'document.pdf')
+            
+            if final_result.returncode == 0 and os.path.exists(pdf_file):
+                # Move PDF to output directory; only a rename across
+                # filesystems (e.g. out of RAM scratch) has to copy the bytes
+                try:
+                    os.replace(pdf_file, output_path)
+                except OSError as e:
+                    if e.errno != errno.EXDEV:
+                        raise
+                    import shutil
                     shutil.copy2(pdf_file, output_path)
-                    return output_path, None
-                else:
-                    # Return compilation errors
-                    error_log = final_result.stderr or final_result.stdout
-                    return None, f"LaTeX compilation failed:\n{error_log}"
+                return None
             
-            except subprocess.TimeoutExpired:
-                return None, "LaTeX compilation timeout"
-            except Exception as e:
-                return None, f"PDF generation error: {str(e)}"
+            # Return compilation errors; batchmode keeps them in the log
+            return self._read_log(temp_dir) or final_result.stderr or final_result.stdout
+    
+    def _run_passes(self,
+                    latex_code: str,
+                    fmt_args: List[str],
+                    env: Optional[Dict[str, str]],
+                    compile_twice: bool,
+                    temp_dir: str,
+                    pipe: bool) -> subprocess.CompletedProcess:
+        """Run one or two LaTeX passes in ``temp_dir``; return the last one."""
+        # Pipe the LaTeX code in, or write it to file without a pipe
+        if pipe:
+            source_arg, source_input = f'\\input{{{_STDIN_SOURCE}}}', latex_code
+        else:
+            source_arg, source_input = os.path.join(temp_dir, 'document.tex'), None
+            with open(source_arg, 'w', encoding='utf-8') as f:
+                f.write(latex_code)
+        
+        # First compilation; when a second pass follows, this one only
+        # needs to write the .aux/.toc files, so skip producing the PDF
+        draft_args = ['-draftmode'] if compile_twice else []
+        result1 = subprocess.run([
+            self.latex_compiler,
+            *fmt_args,
+            *draft_args,
+            *_LATEX_RUN_ARGS,
+            '-jobname=document',
+            '-output-directory', temp_dir,
+            source_arg
+        ], input=source_input, capture_output=True, text=True, timeout=60, env=env)
+        
+        # Second compilation if requested (for TOC, references, etc.), or
+        # when a single pass finds references it could not resolve
+        if result1.returncode == 0 and (compile_twice or self._log_requests_rerun(temp_dir)):
+            return subprocess.run([
+                self.latex_compiler,
+                *fmt_args,
+                *_LATEX_RUN_ARGS,
+                '-jobname=document',
+                '-output-directory', temp_dir,
+                source_arg
+            ], input=source_input, capture_output=True, text=True, timeout=60, env=env)
+        return result1
+    
+    @staticmethod
+    def _read_log(temp_dir: str) -> str:
+        """Read the last pass's log, or '' if it was never written."""
+        try:
+            with open(os.path.join(temp_dir, 'document.log'), encoding='utf-8', errors='replace') as log:
+                return log.read()
+        except OSError:
+            return ''
+    
+    def _log_requests_rerun(self, temp_dir: str) -> bool:
+        """Check the pass's log for LaTeX's request to run again."""
+        return 'Rerun to get' in self._read_log(temp_dir)
+    
+    def compile_pdfs_batch(self, 
+                           jobs: List[Tuple[str, str]],
+                           compile_twice: bool = True) -> List[Tuple[Optional[str], Optional[str]]]:
+        """Compile several ``(latex_code, output_filename)`` jobs concurrently.
+        
+        Results come back in job order, each as ``compile_pdf`` returns it.
+        """
+        if not jobs:
+            return []
+        
+        # Each pdflatex is a single-threaded child process with its own scratch
+        # directory, so threads are enough to keep one compile per core busy
+        workers = min(os.cpu_count() or 1, len(jobs))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda job: self.compile_pdf(job[0], job[1], compile_twice), jobs
+            ))
     
     def generate_cover_page(self, 
                            title: str,
@@ -264,6 +600,17 @@ class PDFGenerator:
                            style: str = "modern") -> str:
         """Generate LaTeX code for a cover page."""
         
+        # Probe the image once here, before the cache lookup, so a cover image
+        # that appears later isn't masked by a cached image-less page; the
+        # templates then trust the path they are given
+        if cover_image and not os.path.exists(cover_image):
+            cover_image = None
+        return self._render_cover(title, author, cover_image, style)
+    
+    def _render_cover_uncached(self, title: str, author: str,
+                               cover_image: Optional[str], style: str) -> str:
+        """Render a cover page with the template for ``style``."""
+        
         cover_styles = {
             "modern": self._modern_cover_template,
             "classic": self._classic_cover_template,
@@ -276,95 +623,70 @@ class PDFGenerator:
     def _modern_cover_template(self, title: str, author: str, cover_image: Optional[str]) -> str:
         """Modern cover page template."""
         
-        cover_latex = [
-            "\\begin{titlepage}",
-            "\\centering",
-            "\\vspace*{2cm}",
-        ]
-        
-        if cover_image and os.path.exists(cover_image):
-            cover_latex.extend([
-                f"\\includegraphics[width=0.6\\textwidth]{{{cover_image}}}",
-                "\\vspace{2cm}",
-            ])
-        
-        cover_latex.extend([
-            "{\\Huge\\bfseries " + self._clean_text_for_latex(title) + "\\par}",
-            "\\vspace{1.5cm}",
-            "{\\Large\\itshape " + self._clean_text_for_latex(author) + "\\par}",
-            "\\vfill",
-            "{\\large \\today\\par}",
-            "\\end{titlepage}",
-            "\\newpage"
-        ])
-        
-        return '\n'.join(cover_latex)
+        image_block = (
+            f"\\includegraphics[width=0.6\\textwidth]{{{cover_image}}}\n\\vspace{{2cm}}\n"
+            if cover_image else ""
+        )
+        
+        return f"""\\begin{{titlepage}}
+\\centering
+\\vspace*{{2cm}}
+{image_block}{{\\Huge\\bfseries {self._clean_text_for_latex(title)}\\par}}
+\\vspace{{1.5cm}}
+{{\\Large\\itshape {self._clean_text_for_latex(author)}\\par}}
+\\vfill
+{{\\large \\today\\par}}
+\\end{{titlepage}}
+\\newpage"""
     
     def _classic_cover_template(self, title: str, author: str, cover_image: Optional[str]) -> str:
         """Classic cover page template."""
         
-        cover_latex = [
-            "\\begin{titlepage}",
-            "\\centering",
-            "\\vspace*{3cm}",
-            "\\rule{\\linewidth}{0.5mm} \\\\[0.4cm]",
-            "{\\huge\\bfseries " + self._clean_text_for_latex(title) + "\\par}",
-            "\\rule{\\linewidth}{0.5mm} \\\\[1.5cm]",
-        ]
-        
-        if cover_image and os.path.exists(cover_image):
-            cover_latex.extend([
-                f"\\includegraphics[width=0.5\\textwidth]{{{cover_image}}}",
-                "\\vspace{1cm}",
-            ])
-        
-        cover_latex.extend([
-            "{\\Large\\itshape " + self._clean_text_for_latex(author) + "\\par}",
-            "\\vfill",
-            "{\\large \\today\\par}",
-            "\\end{titlepage}",
-            "\\newpage"
-        ])
-        
-        return '\n'.join(cover_latex)
+        image_block = (
+            f"\\includegraphics[width=0.5\\textwidth]{{{cover_image}}}\n\\vspace{{1cm}}\n"
+            if cover_image else ""
+        )
+        
+        return f"""\\begin{{titlepage}}
+\\centering
+\\vspace*{{3cm}}
+\\rule{{\\linewidth}}{{0.5mm}} \\\\[0.4cm]
+{{\\huge\\bfseries {self._clean_text_for_latex(title)}\\par}}
+\\rule{{\\linewidth}}{{0.5mm}} \\\\[1.5cm]
+{image_block}{{\\Large\\itshape {self._clean_text_for_latex(author)}\\par}}
+\\vfill
+{{\\large \\today\\par}}
+\\end{{titlepage}}
+\\newpage"""
     
     def _children_cover_template(self, title: str, author: str, cover_image: Optional[str]) -> str:
         """Children's book cover page template."""
         
-        cover_latex = [
-            "\\begin{titlepage}",
-            "\\centering",
-            "\\vspace*{1cm}",
-        ]
-        
-        if cover_image and os.path.exists(cover_image):
-            cover_latex.extend([
-                f"\\includegraphics[width=0.8\\textwidth]{{{cover_image}}}",
-                "\\vspace{1cm}",
-            ])
-        
-        cover_latex.extend([
-            "{\\Huge\\colorbox{yellow}{\\textcolor{blue}{\\textbf{" + self._clean_text_for_latex(title) + "}}}\\par}",
-            "\\vspace{2cm}",
-            "{\\LARGE\\textcolor{purple}{\\textbf{" + self._clean_text_for_latex(author) + "}}\\par}",
-            "\\vfill",
-            "\\end{titlepage}",
-            "\\newpage"
-        ])
-        
-        return '\n'.join(cover_latex)
+        image_block = (
+            f"\\includegraphics[width=0.8\\textwidth]{{{cover_image}}}\n\\vspace{{1cm}}\n"
+            if cover_image else ""
+        )
+        
+        return f"""\\begin{{titlepage}}
+\\centering
+\\vspace*{{1cm}}
+{image_block}{{\\Huge\\colorbox{{yellow}}{{\\textcolor{{blue}}{{\\textbf{{{self._clean_text_for_latex(title)}}}}}}}\\par}}
+\\vspace{{2cm}}
+{{\\LARGE\\textcolor{{purple}}{{\\textbf{{{self._clean_text_for_latex(author)}}}}}\\par}}
+\\vfill
+\\end{{titlepage}}
+\\newpage"""
     
     def create_audiobook_companion(self, 
                                   project_id: str, 
                                   output_filename: str) -> Tuple[Optional[str], Optional[str]]:
         """Create an audiobook companion PDF with QR codes or audio instructions."""
         
-        project = self.db_manager.get_project(project_id)
+        project = self.db_manager.get_project_with_content(project_id)
         if not project:
             return None, "Project not found"
         
-        content_items = self.db_manager.get_project_content(project_id)
-        audio_items = [item for item in content_items if item['type'] == 'audio']
+        audio_items = [item for item in project['content'] if item['type'] == 'audio']
         
         if not audio_items:
             return None, "No audio content found in project"
@@ -378,44 +700,22 @@ class PDFGenerator:
     def _generate_audiobook_latex(self, project: Dict, audio_items: List[Dict]) -> str:
         """Generate LaTeX code for audiobook companion."""
         
-        latex_sections = [
-            "\\documentclass[a5paper,12pt]{article}",
-            "\\usepackage[utf8]{inputenc}",
-            "\\usepackage{graphicx}",
-            "\\usepackage[margin=1in]{geometry}",
-            "\\usepackage{hyperref}",
-            "\\usepackage{xcolor}",
-            "",
-            f"\\title{{Audio Companion: {self._clean_text_for_latex(project['name'])}}}",
-            "\\author{StoryWeaver AI}",
-            "\\date{\\today}",
-            "",
-            "\\begin{document}",
-            "\\maketitle",
-            "\\newpage",
-            "",
-            "\\section*{How to Use This Audiobook}",
-            "This companion guide contains instructions for accessing the audio narration of your story.",
-            "\\vspace{1em}",
-            "",
-            "\\section*{Audio Tracks}",
-        ]
-        
-        for i, audio_item in enumerate(audio_items, 1):
-            audio_filename = os.path.basename(audio_item['audio_path']) if audio_item['audio_path'] else f"track_{i}.mp3"
-            latex_sections.extend([
-                f"\\subsection*{{Track {i}}}",
-                f"\\textbf{{File:}} {audio_filename}\\\\",
-                f"\\textbf{{Duration:}} Approximately {self._estimate_audio_duration(audio_item)} minutes\\\\",
-                "\\vspace{1em}",
-            ])
-        
-        latex_sections.extend([
-            "",
-            "\\end{document}"
-        ])
-        
-        return '\n'.join(latex_sections)
+        tracks = '\n'.join(self._format_audio_track(i, audio_item)
+                           for i, audio_item in enumerate(audio_items, 1))
+        
+        return ''.join((
+            _AUDIOBOOK_PREAMBLE.substitute(title=self._clean_text_for_latex(project['name'])),
+            tracks,
+            _AUDIOBOOK_EPILOGUE
+        ))
+    
+    def _format_audio_track(self, number: int, audio_item: Dict) -> str:
+        """Format one track entry of the audiobook companion."""
+        audio_filename = os.path.basename(audio_item['audio_path']) if audio_item['audio_path'] else f"track_{number}.mp3"
+        return (f"\\subsection*{{Track {number}}}\n"
+                f"\\textbf{{File:}} {audio_filename}\\\\\n"
+                f"\\textbf{{Duration:}} Approximately {self._estimate_audio_duration(audio_item)} minutes\\\\\n"
+                "\\vspace{1em}")
     
     def _estimate_audio_duration(self, audio_item: Dict) -> float:
         """Estimate audio duration based on text length."""
@@ -0,0 +1,94 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from models.database import DatabaseManager
+
+
+class QueuedWriteTests(unittest.TestCase):
+    """Writes queued with ``wait=False`` and made visible by ``flush()``."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = DatabaseManager(os.path.join(self.tmp.name, 'test.db'))
+
+    def tearDown(self):
+        self.db.flush()
+        self.tmp.cleanup()
+
+    def test_queued_project_is_readable_after_flush(self):
+        project_id = self.db.create_project('Queued', 'story', {'style': 'comic'}, wait=False)
+        self.assertIsInstance(project_id, str)
+
+        self.db.flush()
+
+        project = self.db.get_project(project_id)
+        self.assertEqual(project['name'], 'Queued')
+        self.assertEqual(project['settings'], {'style': 'comic'})
+
+    def test_failed_queued_write_only_loses_itself(self):
+        # The failure is logged by the time flush() returns, whenever the
+        # writer gets to it
+        with self.assertLogs('models.database', level='ERROR') as logs:
+            before = self.db.create_project('Before', 'story', wait=False)
+            # name is NOT NULL, so this INSERT fails when the writer runs it
+            broken = self.db.create_project(None, 'story', wait=False)
+            after = self.db.create_project('After', 'story', wait=False)
+            content_ids = self.db.add_content_bulk(before, [
+                {'content_type': 'scene', 'text': 'one', 'order_index': 0},
+                {'content_type': 'scene', 'text': 'two', 'order_index': 1},
+            ], wait=False)
+            self.db.flush()
+
+        self.assertEqual(len(logs.records), 1)
+        self.assertIsInstance(logs.records[0].exc_info[1], sqlite3.IntegrityError)
+        self.assertIsNone(self.db.get_project(broken))
+        self.assertEqual(self.db.get_project(before)['name'], 'Before')
+        self.assertEqual(self.db.get_project(after)['name'], 'After')
+        stored = [item['id'] for item in self.db.get_project_content(before)]
+        self.assertEqual(stored, content_ids)
+
+    def test_failed_write_raises_for_a_waiting_caller(self):
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.create_project(None, 'story')
+
+        # Later writes are still served
+        project_id = self.db.create_project('Next', 'story')
+        self.assertEqual(self.db.get_project(project_id)['name'], 'Next')
+
+    def test_flush_racing_other_writers_sees_every_earlier_write(self):
+        n_threads, per_thread = 8, 25
+        errors = []
+
+        def writer(index):
+            try:
+                project_id = self.db.create_project(f'Project {index}', 'story', wait=False)
+                content_ids = []
+                for i in range(per_thread):
+                    content_ids += self.db.add_content_bulk(project_id, [
+                        {'content_type': 'scene', 'text': f'{index}-{i}', 'order_index': i}
+                    ], wait=False)
+                self.db.flush()
+
+                if self.db.get_project(project_id) is None:
+                    errors.append(f'thread {index} flushed but its project is missing')
+                stored = [item['id'] for item in self.db.get_project_content(project_id)]
+                if stored != content_ids:
+                    errors.append(f'thread {index} flushed but read {len(stored)} of {per_thread} rows')
+            except Exception as e:
+                errors.append(repr(e))
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(n_threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.db.get_projects()), n_threads)
+
+
+if __name__ == '__main__':
+    unittest.main()